@@ -0,0 +1,62 @@
+"""
+PrimeBroward CRM - property index advice
+Prints the most used property listing filters and sorts with their query
+plans, and with --apply creates the advised indexes (see IndexAdvisor)
+"""
+import argparse
+import json
+
+from app.models import init_db
+from app.models.database import SessionLocal
+from app.services import IndexAdvisor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Advise indexes for the property listing")
+    parser.add_argument("--apply", action="store_true", help="create the advised indexes and drop stale ones")
+    parser.add_argument("--dry-run", action="store_true", help="with --apply, only print what would change")
+    parser.add_argument("--min-hits", type=int, default=10, help="ignore shapes used fewer times (default 10)")
+    parser.add_argument("--max-indexes", type=int, default=10, help="most advised indexes to keep (default 10)")
+    parser.add_argument("--limit", type=int, default=20, help="shapes to report (default 20)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.apply:
+            result = IndexAdvisor.apply(db, args.min_hits, args.max_indexes, args.dry_run)
+            if args.dry_run:
+                print("Dry run, nothing changed")
+            for action in ('created', 'dropped', 'kept'):
+                for name in result[action]:
+                    print(f"{action}: {name}")
+            if not any(result[action] for action in ('created', 'dropped', 'kept')):
+                print("No advised indexes")
+            return
+        
+        report = IndexAdvisor.report(db, args.limit)
+        if args.json:
+            print(json.dumps(report, indent=2))
+            return
+        
+        for shape in report['shapes']:
+            filters = ', '.join(shape['filters']) or '(no filters)'
+            status = "NEEDS INDEX" if shape['needs_index'] else "ok"
+            print(f"{shape['hits']:>8}  {filters}  sort {shape['sort']} {shape['order']}  [{status}]")
+            for detail in shape['plan']:
+                print(f"            {detail}")
+            suggested = shape['suggested_index']
+            if shape['needs_index'] and suggested:
+                note = " (exists, unused)" if suggested['exists'] else ""
+                print(f"            -> {suggested['name']} ({', '.join(suggested['columns'])}){note}")
+        if not report['shapes']:
+            print("No listings recorded yet")
+        print(f"Advised indexes: {', '.join(report['advised_indexes']) or 'none'}")
+        print(report['note'])
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,11 +12,25 @@ class Settings(BaseSettings):
     TEMPLATES_DIR: Optional[Path] = None
     EXPORTS_DIR: Optional[Path] = None
     LETTERS_DIR: Optional[Path] = None
+    REJECTS_DIR: Optional[Path] = None
     
     # API settings
     API_HOST: str = "127.0.0.1"
     API_PORT: int = 8000
-    
+
+    # CSV import - parser processes (1 = parse in-process) and chunks in flight
+    IMPORT_WORKERS: int = 1
+    IMPORT_QUEUE_DEPTH: int = 4
+
+    # Derived property fields - doc stamp tax per dollar of sale price, and the
+    # owner domicile state that doesn't count as absentee (see POST /admin/recompute-derived)
+    DOC_STAMP_RATE: float = 0.007
+    ABSENTEE_HOME_STATE: str = "FL"
+
+    # Finished exports are kept in EXPORTS_DIR and served again until the data
+    # changes; least recently used ones are removed past this size (0 = no cache)
+    EXPORT_CACHE_MAX_MB: int = 1024
+
     # CORS - will be parsed in __init__
     CORS_ORIGINS: List[str] = []
     
@@ -58,9 +72,12 @@ class Settings(BaseSettings):
         
         if self.LETTERS_DIR is None:
             self.LETTERS_DIR = self.DATA_DIR / "letters"
+        
+        if self.REJECTS_DIR is None:
+            self.REJECTS_DIR = self.DATA_DIR / "rejects"
 
 settings = Settings()
 
 # Create directories if they don't exist
-for dir_path in [settings.DATA_DIR, settings.TEMPLATES_DIR, settings.EXPORTS_DIR, settings.LETTERS_DIR]:
+for dir_path in [settings.DATA_DIR, settings.TEMPLATES_DIR, settings.EXPORTS_DIR, settings.LETTERS_DIR, settings.REJECTS_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -4,16 +4,19 @@ from contextlib import asynccontextmanager
 import os
 
 from .config import settings
-from .routes import properties_router, leads_router, letters_router, import_export_router
+from .routes import properties_router, leads_router, letters_router, import_export_router, admin_router
 
 
 # Flag to track if initialization is complete
 _initialized = False
 
+# Builds or fills the search index after lazy init, off the request
+_search_index_thread = None
+
 
 def lazy_init():
     """Lazy initialization - called on first real request, not during startup"""
-    global _initialized
+    global _initialized, _search_index_thread
     if _initialized:
         return
     
@@ -30,9 +33,18 @@ def lazy_init():
         init_db()
         print(f"[*] Database initialized: {settings.DATABASE_PATH}", flush=True)
         
+        # Copy leads onto properties that lack them (e.g. after an upgrade)
+        from .models.database import engine
+        from .services import LeadService, DataVersionService
+        with engine.begin() as connection:
+            synced = LeadService.sync_properties(connection)
+            if synced:
+                DataVersionService.bump(connection)
+                print(f"[*] Copied lead status onto {synced} properties", flush=True)
+        
         # Initialize templates
         from .models.database import SessionLocal
-        from .services import LetterService
+        from .services import LetterService, ImportJobService
         db = SessionLocal()
         try:
             LetterService.init_default_templates(db)
@@ -42,6 +54,23 @@ def lazy_init():
         finally:
             db.close()
         
+        # Jobs that were running when the last process died can't finish
+        db = SessionLocal()
+        try:
+            interrupted = ImportJobService.recover_interrupted(db)
+            if interrupted:
+                print(f"[*] Marked {interrupted} interrupted import job(s) as failed", flush=True)
+        except:
+            pass
+        finally:
+            db.close()
+        
+        # Filling the search index can take a while; searches scan the
+        # table until it is ready
+        import threading
+        _search_index_thread = threading.Thread(target=build_search_index, daemon=True)
+        _search_index_thread.start()
+        
         _initialized = True
         print("[*] Lazy initialization complete", flush=True)
     except Exception as e:
@@ -49,10 +78,67 @@ def lazy_init():
         _initialized = True  # Don't retry on every request
 
 
+def build_search_index():
+    """Create the search index if this database doesn't have one yet - runs in background"""
+    try:
+        from .models.database import engine
+        from .services import PropertySearch
+        
+        with engine.begin() as connection:
+            if PropertySearch.ensure_index(connection):
+                print("[*] Search index ready", flush=True)
+            else:
+                print("[!] SQLite lacks FTS5; search will scan every property", flush=True)
+    except Exception as e:
+        print(f"[!] Search index error: {e}", flush=True)
+
+
 # Track CSV import status
 _csv_import_status = {"status": "not_started", "message": ""}
 
 
+def stream_csv_url(db, source, restarts: int = 2) -> dict:
+    """
+    Import from an HTTPRangeReader, starting over if the object changes
+    
+    A dropped connection resumes where it left off, but a changed object
+    can't be spliced onto what was already read; its new ETag gives it a
+    new checkpoint, so the import starts again from the first row.
+    """
+    global _csv_import_status
+    import io
+    from .services.csv_service import CSVService
+    from .services.import_sources import HTTPRangeReader, SourceChangedError
+    
+    def on_progress(progress):
+        global _csv_import_status
+        if progress['percent'] is not None:
+            _csv_import_status = {
+                "status": "importing",
+                "message": f"Downloading and importing CSV data... {progress['percent']}% "
+                           f"({progress['processed']} rows)"
+            }
+    
+    while True:
+        _csv_import_status = {"status": "importing", "message": "Downloading and importing CSV data..."}
+        try:
+            with io.BufferedReader(source, buffer_size=1 << 20) as stream:
+                return CSVService.import_stream(
+                    db, stream,
+                    total_bytes=source.size,
+                    source_name=source.url,
+                    source_key=source.source_key,
+                    progress_callback=on_progress
+                )
+        except SourceChangedError:
+            db.rollback()
+            if restarts <= 0:
+                raise
+            restarts -= 1
+            print(f"[*] {source.url} changed during the download; starting over", flush=True)
+            source = HTTPRangeReader(source.url, source.retries, source.timeout, source.backoff)
+
+
 def import_csv_data():
     """Import CSV data from DigitalOcean Spaces - runs in background"""
     global _csv_import_status
@@ -65,39 +151,48 @@ def import_csv_data():
     try:
         from .models.database import SessionLocal
         from .models.property import Property
+        from .services.csv_service import CSVService
         
         db = SessionLocal()
         try:
+            from .services.import_sources import HTTPRangeReader
+            
+            _csv_import_status = {"status": "downloading", "message": "Connecting to CSV source..."}
+            
+            # Rows are parsed and written while the body downloads; dropped
+            # connections resume with a Range request
+            source = HTTPRangeReader(csv_url)
+            
+            # Only an unfinished import of this same object is resumed, not
+            # e.g. a cancelled upload
             property_count = db.query(Property).count()
-            if property_count > 0:
+            resuming = CSVService.has_unfinished_import(db, source.source_key)
+            if property_count > 0 and not resuming:
+                source.close()
                 _csv_import_status = {"status": "skipped", "message": f"Database already has {property_count} properties"}
                 print(f"[*] Database already has {property_count} properties. Skipping CSV import.", flush=True)
                 return
             
-            _csv_import_status = {"status": "downloading", "message": "Downloading CSV..."}
-            print(f"[*] Downloading CSV from: {csv_url}", flush=True)
+            # Both write to every property row; a first load also suspends
+            # the index's triggers, so let the index be built first
+            if _search_index_thread is not None:
+                _search_index_thread.join()
             
-            import urllib.request
-            import tempfile
+            print(f"[*] Streaming CSV from: {csv_url}", flush=True)
+            if resuming:
+                print(f"[*] Resuming interrupted import...", flush=True)
+            else:
+                print(f"[*] Starting import...", flush=True)
+            result = stream_csv_url(db, source)
             
-            temp_csv = tempfile.NamedTemporaryFile(mode='w+b', suffix='.csv', delete=False)
-            try:
-                urllib.request.urlretrieve(csv_url, temp_csv.name)
-                print(f"[*] CSV downloaded. Starting import...", flush=True)
-                
-                _csv_import_status = {"status": "importing", "message": "Importing CSV data..."}
-                
-                from .services.csv_service import CSVService
-                result = CSVService.import_csv(db, temp_csv.name)
-                
-                msg = f"Imported {result.get('imported', 0)} new, updated {result.get('updated', 0)} existing"
-                _csv_import_status = {"status": "complete", "message": msg}
-                print(f"[*] CSV import complete! {msg}", flush=True)
-            finally:
-                try:
-                    os.unlink(temp_csv.name)
-                except:
-                    pass
+            msg = (
+                f"Imported {result.get('imported', 0)} new, updated {result.get('updated', 0)} existing, "
+                f"{result.get('unchanged', 0)} unchanged"
+            )
+            if result.get('error_count'):
+                msg += f"; {result['error_count']} rows rejected (see rejects/{result['reject_id']}.csv)"
+            _csv_import_status = {"status": "complete", "message": msg}
+            print(f"[*] CSV import complete! {msg}", flush=True)
         finally:
             db.close()
     except Exception as e:
@@ -113,6 +208,10 @@ async def lifespan(app: FastAPI):
     print("[*] Server ready to accept connections", flush=True)
     yield
     print("[*] Shutting down...", flush=True)
+    
+    # Keep the listing usage recorded since the last background flush
+    from .services import IndexAdvisor
+    IndexAdvisor.flush()
 
 
 # Create FastAPI app with minimal startup
@@ -137,6 +236,7 @@ app.include_router(properties_router)
 app.include_router(leads_router)
 app.include_router(letters_router)
 app.include_router(import_export_router)
+app.include_router(admin_router)
 
 
 # ============= HEALTH CHECK ENDPOINTS (NO DEPENDENCIES) =============
@@ -3,6 +3,10 @@ from .property import Property
 from .lead import Lead
 from .letter_template import LetterTemplate
 from .letter_history import LetterHistory
+from .import_checkpoint import ImportCheckpoint
+from .import_job import ImportJob
+from .data_version import DataVersion
+from .query_usage import QueryUsage
 
 
 
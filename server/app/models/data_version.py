@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from .database import Base
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    
+    # One counter per data set; "properties" is bumped by every write that
+    # changes what an export returns (see DataVersionService)
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    
+    updated_date = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "updated_date": str(self.updated_date) if self.updated_date else None,
+        }
@@ -29,8 +29,9 @@ def get_db():
 
 def init_db():
     """Initialize database tables"""
-    from . import Property, Lead, LetterTemplate, LetterHistory
+    from . import Property, Lead, LetterTemplate, LetterHistory, ImportCheckpoint, ImportJob, DataVersion, QueryUsage
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
     
     # Enable WAL mode for better performance
     with engine.connect() as conn:
@@ -40,3 +41,25 @@ def init_db():
         conn.execute(text("PRAGMA temp_store=MEMORY"))
         conn.commit()
 
+def add_missing_columns():
+    """
+    Add model columns and indexes that are missing from existing tables
+    
+    create_all only creates new tables, so databases created by an older
+    version get new nullable columns and new indexes added here.
+    """
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table.name})"))}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            # By name: SQLAlchemy can't reflect expression indexes to check for them
+            indexes = {row[0] for row in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+                {'table': table.name}
+            )}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float
+from sqlalchemy.sql import func
+from .database import Base
+
+class ImportCheckpoint(Base):
+    __tablename__ = "import_checkpoints"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source_key = Column(String(64), unique=True, nullable=False, index=True)
+    source_name = Column(String(500))
+    source_mtime = Column(Float)  # of a local file; the key only samples its content
+    status = Column(String(20), default="running", index=True)  # running, complete
+    full_refresh = Column(Boolean, default=False)  # loading a staging table to swap in
+    
+    # Position after the last committed chunk
+    byte_offset = Column(Integer, default=0)
+    chunk_number = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    
+    # Counters accumulated across resumed runs
+    imported = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    unchanged = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    
+    # Reject file for this import, and its size as of the last committed chunk
+    reject_id = Column(String(32))
+    reject_bytes = Column(Integer, default=0)
+    
+    created_date = Column(DateTime, server_default=func.now())
+    updated_date = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "source_key": self.source_key,
+            "source_name": self.source_name,
+            "source_mtime": self.source_mtime,
+            "status": self.status,
+            "full_refresh": bool(self.full_refresh),
+            "byte_offset": self.byte_offset,
+            "chunk_number": self.chunk_number,
+            "rows_processed": self.rows_processed,
+            "imported": self.imported,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "error_count": self.error_count,
+            "reject_id": self.reject_id,
+            "created_date": str(self.created_date) if self.created_date else None,
+            "updated_date": str(self.updated_date) if self.updated_date else None,
+        }
+
+
+
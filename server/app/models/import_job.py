@@ -0,0 +1,72 @@
+import json
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text
+from sqlalchemy.sql import func
+from .database import Base
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(20), default="import")  # import, recompute
+    source_name = Column(String(500))
+    full_refresh = Column(Boolean, default=False)
+    
+    status = Column(String(20), default="queued", index=True)  # queued, running, complete, failed, cancelled
+    stage = Column(String(50), default="queued")
+    message = Column(Text)
+    cancel_requested = Column(Boolean, default=False)
+    
+    # Progress, as reported by CSVService.import_csv
+    rows_processed = Column(Integer, default=0)
+    total_rows = Column(Integer)
+    bytes_read = Column(Integer, default=0)
+    total_bytes = Column(Integer)
+    percent = Column(Integer)
+    rows_per_second = Column(Integer)
+    eta_seconds = Column(Float)
+    
+    imported = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    unchanged = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    removed = Column(Integer)  # full refresh only: rows dropped, and kept for leads/letters
+    retained = Column(Integer)
+    errors = Column(Text)  # JSON list of the first row errors
+    reject_id = Column(String(32))  # every rejected row, see /jobs/{id}/rejects
+    
+    created_date = Column(DateTime, server_default=func.now())
+    started_date = Column(DateTime)
+    finished_date = Column(DateTime)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind or "import",
+            "source_name": self.source_name,
+            "full_refresh": bool(self.full_refresh),
+            "status": self.status,
+            "stage": self.stage,
+            "message": self.message,
+            "cancel_requested": bool(self.cancel_requested),
+            "rows_processed": self.rows_processed,
+            "total_rows": self.total_rows,
+            "bytes_read": self.bytes_read,
+            "total_bytes": self.total_bytes,
+            "percent": self.percent,
+            "rows_per_second": self.rows_per_second,
+            "eta_seconds": self.eta_seconds,
+            "imported": self.imported,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "error_count": self.error_count,
+            "removed": self.removed,
+            "retained": self.retained,
+            "errors": json.loads(self.errors) if self.errors else [],
+            "reject_id": self.reject_id,
+            "created_date": str(self.created_date) if self.created_date else None,
+            "started_date": str(self.started_date) if self.started_date else None,
+            "finished_date": str(self.finished_date) if self.finished_date else None,
+        }
+
+
+
@@ -56,14 +56,26 @@ class Property(Base):
     potential_equity = Column(Float, index=True)
     is_absentee_owner = Column(Boolean, default=False, index=True)
     
+    # Copy of the property's lead, so listings can filter without a join
+    # (kept in step by LeadService)
+    lead_id = Column(Integer)
+    lead_status = Column(String(50), index=True)
+    
+    # Fingerprint of the imported source fields, used to skip unchanged rows
+    source_hash = Column(String(16))
+    
     # Timestamps
-    created_date = Column(DateTime, server_default=func.now())
+    created_date = Column(DateTime, server_default=func.now(), index=True)  # default listing order
     updated_date = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Composite indexes for common queries
     __table_args__ = (
         Index('idx_city_use_type', 'situs_city', 'use_type'),
         Index('idx_value_equity', 'just_value', 'potential_equity'),
+        # Prefix lookups for /properties/suggest (see PropertySuggest)
+        Index('idx_suggest_owner', func.upper(name_line_1)),
+        Index('idx_suggest_street', func.upper(situs_street_name)),
+        Index('idx_suggest_address', situs_street_number, func.upper(situs_street_name)),
     )
     
     def to_dict(self):
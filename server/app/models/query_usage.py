@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from .database import Base
+
+class QueryUsage(Base):
+    __tablename__ = "query_usage"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # A property listing shape: the filters given (comma-separated names, in
+    # order), the sort column and its direction (see IndexAdvisor)
+    filters = Column(String(500), nullable=False, default='')
+    sort = Column(String(100), nullable=False)
+    direction = Column(String(4), nullable=False)
+    
+    hits = Column(Integer, default=0, nullable=False)
+    last_used = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint('filters', 'sort', 'direction', name='uq_query_usage_shape'),
+    )
+    
+    def to_dict(self):
+        return {
+            "filters": self.filters.split(',') if self.filters else [],
+            "sort": self.sort,
+            "order": self.direction,
+            "hits": self.hits,
+            "last_used": str(self.last_used) if self.last_used else None,
+        }
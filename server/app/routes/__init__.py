@@ -2,6 +2,7 @@ from .properties import router as properties_router
 from .leads import router as leads_router
 from .letters import router as letters_router
 from .import_export import router as import_export_router
+from .admin import router as admin_router
 
 
 
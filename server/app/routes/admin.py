@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ..models import get_db
+from ..services import ImportJobService, IndexAdvisor
+from ..config import settings
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.post("/recompute-derived")
+def recompute_derived_fields(db: Session = Depends(get_db)):
+    """
+    Re-derive estimated purchase price, confidence, equity and absentee flags
+    
+    Applies the current DOC_STAMP_RATE and ABSENTEE_HOME_STATE settings to
+    every property without re-importing. Runs as a background job; follow
+    it with GET /import-export/jobs/{job_id}.
+    """
+    job = ImportJobService.submit_recompute(db)
+    return {
+        "success": True,
+        "message": "Recompute queued",
+        "job_id": job.id,
+        "job": job.to_dict(),
+        "doc_stamp_rate": settings.DOC_STAMP_RATE,
+        "absentee_home_state": settings.ABSENTEE_HOME_STATE,
+    }
+
+
+@router.get("/index-advice")
+def get_index_advice(limit: int = Query(50, ge=1, le=500), db: Session = Depends(get_db)):
+    """
+    Query plans of the most used property listing filters and sorts
+    
+    Shapes whose listing or count sorts in a temp B-tree or scans the table
+    have needs_index set, with the index that would serve them. Those
+    indexes make counts index-only; listings still read their rows from
+    the table (see note).
+    """
+    return IndexAdvisor.report(db, limit)
+
+
+@router.post("/index-advice/apply")
+def apply_index_advice(
+    min_hits: int = Query(10, ge=1),
+    max_indexes: int = Query(10, ge=0, le=50),
+    dry_run: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Create the advised indexes for shapes used at least min_hits times, and
+    drop advised indexes no such shape needs (also: python advise_indexes.py)
+    """
+    return IndexAdvisor.apply(db, min_hits, max_indexes, dry_run)
@@ -1,99 +1,241 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
 from sqlalchemy.orm import Session
 from pathlib import Path
+from datetime import datetime
+import io
 import shutil
 import uuid
 
-from ..models import get_db
-from ..services import CSVService
+from ..models import get_db, ImportJob
+from ..services import CSVService, ImportJobService, ExportCache, DataVersionService
+from ..services.import_sources import QueueReader, is_supported_source, decompress_prefix
+from ..services.import_rejects import RejectLog
+from ..services.columnar import COLUMNAR_FORMATS, PARQUET_COMPRESSIONS, PARQUET_MAGIC, pyarrow
 from ..config import settings
 
 router = APIRouter(prefix="/import-export", tags=["import-export"])
 
-# Store import progress
-import_progress = {}
-
 
 @router.post("/import")
-async def import_csv(
+def import_csv(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = None,
+    full_refresh: bool = False,
     db: Session = Depends(get_db)
 ):
     """
-    Import a CSV file into the database
+    Import a CSV or Parquet file into the database
     
-    Supports large files by processing in chunks
+    The upload is saved and checked, then imported in the background;
+    poll /import-export/jobs/{job_id} for progress. With full_refresh the
+    file replaces the whole table, swapped in once it has loaded.
     """
     # Validate file type
-    if not file.filename.endswith(('.csv', '.CSV')):
+    if not is_supported_source(file.filename):
         raise HTTPException(
             status_code=400,
-            detail="Only CSV files are supported"
+            detail="Only CSV files (optionally .gz, .zip or .zst compressed) and Parquet files are supported"
         )
     
-    # Save uploaded file temporarily
-    temp_path = settings.DATA_DIR / f"temp_{uuid.uuid4().hex}.csv"
+    # Save uploaded file as sent; the job removes it when it finishes
+    temp_path = settings.DATA_DIR / f"temp_{uuid.uuid4().hex}{Path(file.filename).suffix.lower()}"
     
     try:
         with open(temp_path, 'wb') as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        # Import the CSV
-        result = CSVService.import_csv(db, temp_path)
-        
-        return {
-            "success": True,
-            "message": f"Import completed successfully",
-            "total_rows": result['total_rows'],
-            "imported": result['imported'],
-            "updated": result['updated'],
-            "error_count": result['error_count'],
-            "errors": result['errors'][:10] if result['errors'] else []
-        }
-        
+        CSVService.read_columns(temp_path)
+        job = ImportJobService.submit(
+            db, temp_path,
+            source_name=file.filename,
+            delete_after=True,
+            full_refresh=full_refresh
+        )
     except ValueError as e:
+        temp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        temp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
-    finally:
-        # Clean up temp file
-        if temp_path.exists():
-            temp_path.unlink()
+    
+    return {
+        "success": True,
+        "message": "Import started",
+        "job_id": job.id,
+        "job": job.to_dict()
+    }
+
+
+@router.post("/import-stream")
+async def import_csv_stream(
+    request: Request,
+    filename: str = "upload.csv",
+    full_refresh: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Import a CSV sent as the raw request body, upserting while it arrives
+    
+    Send the file itself as the body (curl --data-binary @data.csv); it may
+    be gzip, ZIP or zstd compressed. Nothing is written to disk first; the
+    header is checked before the job starts and the response comes back
+    once the whole body has been received.
+    """
+    if ImportJobService.is_busy():
+        raise HTTPException(status_code=409, detail="Another import is in progress")
+    
+    body = request.stream()
+    
+    # Hold the body back until the header record is complete and valid
+    buffered = b''
+    columns = None
+    try:
+        async for chunk in body:
+            buffered += chunk
+            if buffered.startswith(PARQUET_MAGIC):
+                raise ValueError("Parquet files are read from the end; upload them to /import-export/import")
+            columns = CSVService.parse_header(decompress_prefix(buffered))
+            if columns is not None:
+                break
+        if columns is None:
+            CSVService.parse_header(decompress_prefix(buffered), final=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientDisconnect:
+        raise HTTPException(status_code=400, detail="Upload was interrupted")
+    
+    content_length = request.headers.get("content-length")
+    reader = QueueReader()
+    job = await run_in_threadpool(
+        ImportJobService.submit_stream,
+        db, io.BufferedReader(reader), filename,
+        int(content_length) if content_length else None,
+        full_refresh
+    )
+    
+    # Feed the rest of the body to the import as it arrives; feed() blocks
+    # while the importer is behind, and returns False once it has stopped
+    try:
+        if await run_in_threadpool(reader.feed, buffered):
+            async for chunk in body:
+                if not await run_in_threadpool(reader.feed, chunk):
+                    break
+            await run_in_threadpool(reader.finish)
+    except ClientDisconnect:
+        await run_in_threadpool(reader.fail, ConnectionError("Upload was interrupted"))
+    
+    await run_in_threadpool(db.refresh, job)
+    return {
+        "success": True,
+        "message": "Upload received",
+        "job_id": job.id,
+        "job": job.to_dict()
+    }
 
 
 @router.post("/import-from-path")
-def import_csv_from_path(file_path: str, db: Session = Depends(get_db)):
+def import_csv_from_path(file_path: str, full_refresh: bool = False, db: Session = Depends(get_db)):
     """
-    Import a CSV file from a local path
+    Import a CSV or Parquet file from a local path
     
-    This is useful for importing large files without uploading
+    This is useful for importing large files without uploading. Runs in the
+    background like an upload.
     """
     path = Path(file_path)
     
     if not path.exists():
         raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
     
-    if not path.suffix.lower() == '.csv':
-        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+    if not is_supported_source(path.name):
+        raise HTTPException(
+            status_code=400,
+            detail="Only CSV files (optionally .gz, .zip or .zst compressed) and Parquet files are supported"
+        )
     
     try:
-        result = CSVService.import_csv(db, path)
-        
-        return {
-            "success": True,
-            "message": f"Import completed successfully",
-            "total_rows": result['total_rows'],
-            "imported": result['imported'],
-            "updated": result['updated'],
-            "error_count": result['error_count']
-        }
-        
+        CSVService.read_columns(path)
+        job = ImportJobService.submit(db, path, full_refresh=full_refresh)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    
+    return {
+        "success": True,
+        "message": "Import started",
+        "job_id": job.id,
+        "job": job.to_dict()
+    }
+
+
+@router.get("/jobs")
+def list_import_jobs(limit: int = 20, db: Session = Depends(get_db)):
+    """List recent import jobs, newest first"""
+    jobs = db.query(ImportJob).order_by(
+        ImportJob.created_date.desc()
+    ).limit(min(max(limit, 1), 100)).all()
+    return [job.to_dict() for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+def get_import_job(job_id: str, db: Session = Depends(get_db)):
+    """Get the stage, progress and errors of an import job"""
+    job = ImportJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_import_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Cancel a queued or running import job
+    
+    Rows already committed stay imported; importing the same file again
+    resumes after them.
+    """
+    job = ImportJobService.cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    if job.status not in ImportJobService.ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Import job already {job.status}")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/rejects")
+def list_import_rejects(job_id: str, offset: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """
+    Page through the rows an import job rejected
+    
+    Each reject has the data row number, folio, reason and the original CSV
+    line. A resumed import's rejects include those from before the resume.
+    """
+    job = ImportJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    page = RejectLog.read_page(job.reject_id, max(offset, 0), min(max(limit, 1), 1000))
+    return {"job_id": job.id, "error_count": job.error_count, **page}
+
+
+@router.get("/jobs/{job_id}/rejects/download")
+def download_import_rejects(job_id: str, db: Session = Depends(get_db)):
+    """Download every row an import job rejected as CSV"""
+    job = ImportJobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    path = RejectLog.existing_path(job.reject_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="This import has no rejected rows")
+    
+    return FileResponse(
+        path=path,
+        filename=f"import_rejects_{job.id}.csv",
+        media_type="text/csv"
+    )
 
 
 @router.get("/export")
@@ -102,9 +244,19 @@ def export_csv(
     use_type: str = None,
     min_value: float = None,
     absentee: bool = None,
-    db: Session = Depends(get_db)
+    format: str = "csv",
+    compression: str = None
 ):
-    """Export properties to CSV file"""
+    """
+    Export properties to CSV, Parquet or Arrow IPC
+    
+    Rows are streamed as they are read from the database, so the download
+    starts at once and the server never holds the whole export. A finished
+    export is cached until the data changes, and the same request is served
+    from the cached file (see ExportCache). Parquet
+    (zstd compressed unless compression says otherwise) and Arrow keep the
+    column types and load straight into pandas; both need pyarrow.
+    """
     filters = {}
     if city:
         filters['city'] = city
@@ -115,16 +267,39 @@ def export_csv(
     if absentee is not None:
         filters['absentee'] = absentee
     
-    try:
-        file_path = CSVService.export_csv(db, filters)
-        
-        return FileResponse(
-            path=file_path,
-            filename=file_path.name,
-            media_type="text/csv"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    if format == "csv":
+        suffix, media_type = ".csv", "text/csv"
+    elif format in COLUMNAR_FORMATS:
+        if compression and (format != "parquet" or compression not in PARQUET_COMPRESSIONS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"compression is for Parquet only, one of: {', '.join(PARQUET_COMPRESSIONS)}"
+            )
+        try:
+            pyarrow()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        suffix, media_type = COLUMNAR_FORMATS[format]
+    else:
+        raise HTTPException(status_code=400, detail="format must be csv, parquet or arrow")
+    
+    filename = f"bcpa_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+    version = DataVersionService.current()
+    key = ExportCache.key(version, format, filters, compression if format == "parquet" else None)
+    
+    cached = ExportCache.lookup(key, suffix)
+    if cached is not None:
+        return FileResponse(path=cached, filename=filename, media_type=media_type)
+    
+    if format == "csv":
+        content = CSVService.iter_export_csv(filters)
+    else:
+        content = CSVService.iter_export_columnar(format, filters, compression)
+    return StreamingResponse(
+        ExportCache.store(content, key, suffix, version),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/sample-headers")
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, func, select
 from typing import Optional
 from pydantic import BaseModel
 
 from ..models import Lead, Property, get_db
+from ..services import DataVersionService, LeadService
+from .responses import FastJSONResponse, row_dicts
 
 router = APIRouter(prefix="/leads", tags=["leads"])
 
@@ -45,18 +47,21 @@ def list_leads(
     db: Session = Depends(get_db)
 ):
     """List leads with filters and pagination"""
-    query = db.query(Lead)
+    # A Core select of the to_dict columns: plain rows, no Lead objects
+    columns = [Lead.__table__.c[name] for name in Lead().to_dict()]
+    conditions = []
     
     if status and status != 'all':
-        query = query.filter(Lead.lead_status == status)
+        conditions.append(Lead.lead_status == status)
     
     if assigned_to:
-        query = query.filter(Lead.assigned_to == assigned_to)
+        conditions.append(Lead.assigned_to == assigned_to)
     
-    total = query.count()
+    total = db.execute(select(func.count(Lead.id)).where(*conditions)).scalar()
     
-    # Apply sorting
-    sort_column = getattr(Lead, sort, Lead.updated_date)
+    # Apply sorting (any lead column, updated_date if unknown)
+    sort_column = Lead.__table__.c.get(sort, Lead.__table__.c.updated_date)
+    query = select(*columns).where(*conditions)
     if order == 'desc':
         query = query.order_by(desc(sort_column))
     else:
@@ -64,14 +69,14 @@ def list_leads(
     
     # Apply pagination
     offset = (page - 1) * limit
-    leads = query.offset(offset).limit(limit).all()
+    leads = db.execute(query.offset(offset).limit(limit)).all()
     
-    return {
-        "data": [lead.to_dict() for lead in leads],
+    return FastJSONResponse({
+        "data": row_dicts(columns, leads),
         "total": total,
         "page": page,
         "limit": limit
-    }
+    })
 
 
 @router.get("/{lead_id}")
@@ -128,6 +133,8 @@ def create_lead(lead_data: LeadCreate, db: Session = Depends(get_db)):
     
     lead = Lead(**lead_data.model_dump())
     db.add(lead)
+    LeadService.sync_property(db, lead.folio_number)
+    DataVersionService.bump(db)
     db.commit()
     db.refresh(lead)
     
@@ -146,6 +153,8 @@ def update_lead(lead_id: int, lead_data: LeadUpdate, db: Session = Depends(get_d
     for key, value in update_data.items():
         setattr(lead, key, value)
     
+    LeadService.sync_property(db, lead.folio_number)
+    DataVersionService.bump(db)
     db.commit()
     db.refresh(lead)
     
@@ -161,6 +170,8 @@ def delete_lead(lead_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Lead not found")
     
     db.delete(lead)
+    LeadService.sync_property(db, lead.folio_number)
+    DataVersionService.bump(db)
     db.commit()
     
     return {"success": True, "message": "Lead deleted"}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -8,6 +9,7 @@ from pathlib import Path
 from ..models import LetterTemplate, LetterHistory, get_db
 from ..services import LetterService
 from ..config import settings
+from .responses import FastJSONResponse, row_dicts
 
 router = APIRouter(prefix="/letters", tags=["letters"])
 
@@ -134,14 +136,15 @@ def get_letter_history(
     db: Session = Depends(get_db)
 ):
     """Get letter generation history"""
-    query = db.query(LetterHistory)
+    columns = [LetterHistory.__table__.c[name] for name in LetterHistory().to_dict()]
+    query = select(*columns)
     
     if folio_number:
-        query = query.filter(LetterHistory.folio_number == folio_number)
+        query = query.where(LetterHistory.folio_number == folio_number)
     
-    history = query.order_by(LetterHistory.generated_date.desc()).limit(limit).all()
+    history = db.execute(query.order_by(LetterHistory.generated_date.desc()).limit(limit)).all()
     
-    return [h.to_dict() for h in history]
+    return FastJSONResponse(row_dicts(columns, history))
 
 
 
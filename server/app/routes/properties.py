@@ -1,17 +1,96 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc, or_
+from sqlalchemy import func, desc, asc, or_, select, tuple_, type_coerce, String
 from typing import Optional, List
+import base64
+import binascii
+import json
 
 from ..models import Property, Lead, get_db
+from ..services import CountCache, IndexAdvisor, PropertySearch, PropertySuggest
+from .responses import FastJSONResponse, row_dicts
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
+# Fields of a listed property: Property.to_dict's, then its lead copy
+LIST_FIELDS = list(Property().to_dict()) + ['lead_status', 'lead_id']
+
+
+def _encode_cursor(sort: str, order: str, value, row_id: int) -> str:
+    """Opaque cursor for the listing position after a row"""
+    data = json.dumps([sort, order, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
+    """(sort value, id) of the row a cursor points after"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, row_id = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Only what _encode_cursor writes; anything else can't be bound as a parameter
+    if not isinstance(row_id, int) or not isinstance(value, (str, int, float, type(None))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise HTTPException(status_code=400, detail="Cursor is for a different sort order")
+    return value, row_id
+
+
+def _parse_fields(fields: str) -> list:
+    """The listing fields asked for (comma-separated), id first; 400 for unknown ones"""
+    names = ['id']
+    for name in fields.split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    unknown = [name for name in names if name not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _keyset_results(db: Session, query, column, descending: bool, after: Optional[tuple], count: int) -> list:
+    """
+    Read up to count rows in (column, id) order, starting after the given position
+    
+    SQLite sorts NULLs first, so the listing is the rows where the column is
+    NULL followed by the rest (the other way round when descending). Each
+    part is read with a range on (column, id) that the column's index can
+    seek to, so a deep page costs the same as the first.
+    """
+    key = type_coerce(column, String)  # compare as stored, e.g. datetimes as their text
+    direction = desc if descending else asc
+    parts = [False, True] if descending else [True, False]  # is the value NULL?
+    
+    if after is not None:
+        value, row_id = after
+        parts = parts[parts.index(value is None):]
+    
+    results = []
+    for is_null in parts:
+        part = query.filter(column.is_(None) if is_null else column.isnot(None))
+        if after is not None:
+            value, row_id = after
+            if is_null == (value is None):
+                if is_null:
+                    part = part.filter(Property.id < row_id if descending else Property.id > row_id)
+                elif descending:
+                    part = part.filter(tuple_(key, Property.id) < tuple_(value, row_id))
+                else:
+                    part = part.filter(tuple_(key, Property.id) > tuple_(value, row_id))
+        part = part.order_by(direction(column), direction(Property.id)).limit(count - len(results))
+        results += db.execute(part).all()
+        if len(results) >= count:
+            break
+    return results
+
 
 @router.get("")
 def list_properties(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     search: Optional[str] = None,
     city: Optional[str] = None,
     zip: Optional[str] = None,
@@ -26,20 +105,57 @@ def list_properties(
     homestead: Optional[str] = None,
     sort: str = "created_date",
     order: str = "desc",
+    count_mode: str = Query("exact", pattern="^(exact|approx|none)$"),
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     List properties with filters and pagination
+    
+    Pass the response's next_cursor as cursor to get the following page;
+    cursor pages seek straight to their first row, so they cost the same
+    however deep they are. page still works, but skips over every row
+    before the page.
+    
+    search matches properties with a word starting with each search word
+    (full-text index); sort=relevance then ranks the best matches first.
+    
+    The total is counted once per set of filters until the data changes.
+    count_mode=approx lets a broad listing's total be estimated from a
+    sample (total_estimated is then true); count_mode=none skips it, for
+    clients that only page forward.
+    
+    fields (comma-separated, e.g. fields=folio_number,name_line_1,just_value)
+    reads and returns only those fields of each property, plus its id.
     """
-    # Base query with lead join
-    query = db.query(
-        Property,
-        Lead.lead_status.label('lead_status'),
-        Lead.id.label('lead_id')
-    ).outerjoin(Lead, Property.folio_number == Lead.folio_number)
+    # Searches go through the full-text index when there is one
+    match = None
+    if search and PropertySearch.is_ready(db):
+        match = PropertySearch.match_query(search)
+    
+    # Any property column can be sorted on (created_date if unknown), or
+    # search relevance
+    by_relevance = sort == 'relevance' and match is not None
+    sort_column = Property.__table__.c.id if by_relevance else Property.__table__.c.get(sort)
+    if sort_column is None:
+        sort, sort_column = 'created_date', Property.__table__.c.created_date
+    order = 'desc' if order == 'desc' else 'asc'
+    after = _decode_cursor(cursor, sort, order) if cursor else None
+    columns = [Property.__table__.c[name] for name in (_parse_fields(fields) if fields else LIST_FIELDS)]
+    
+    # Base query, a Core select of plain rows; lead_status and lead_id are
+    # copied onto properties, so there is no join. sort_key is the sort value
+    # as stored, for the next cursor
+    query = select(*columns, type_coerce(sort_column, String).label('sort_key'))
     
     # Apply filters
-    if search:
+    if by_relevance:
+        fts = PropertySearch.fts
+        query = query.join(fts, fts.c.rowid == Property.id).filter(PropertySearch.matches(match))
+    elif match is not None:
+        query = query.filter(Property.id.in_(PropertySearch.matching_ids(match)))
+    elif search:
+        # Without the index (or words to look up), match substrings
         search_term = f"%{search}%"
         query = query.filter(
             or_(
@@ -76,7 +192,7 @@ def list_properties(
         query = query.filter(Property.use_type == use_type)
     
     if lead_status and lead_status != 'all':
-        query = query.filter(Lead.lead_status == lead_status)
+        query = query.filter(Property.lead_status == lead_status)
     
     if min_value:
         query = query.filter(Property.just_value >= min_value)
@@ -103,35 +219,52 @@ def list_properties(
     elif homestead == 'false':
         query = query.filter(Property.homestead_flag == False)
     
+    filters = {
+        'search': search, 'city': city, 'zip': zip, 'use_type': use_type,
+        'lead_status': lead_status, 'min_value': min_value, 'max_value': max_value,
+        'min_equity': min_equity, 'min_year': min_year, 'max_year': max_year,
+        'absentee': absentee, 'homestead': homestead,
+    }
+    IndexAdvisor.record(filters, 'relevance' if by_relevance else sort, order)
+    
     # Get total count before pagination
-    total = query.count()
+    total, total_estimated = CountCache.count(db, query, CountCache.signature(filters), count_mode)
     
-    # Apply sorting
-    sort_column = getattr(Property, sort, Property.created_date)
-    if order == 'desc':
-        query = query.order_by(desc(sort_column))
+    # Apply sorting and pagination; id breaks ties, so every row has one place.
+    # One row past the page tells whether there is a next one
+    if by_relevance:
+        # Every match is ranked anyway, so a relevance cursor holds an offset
+        offset = after[0] if cursor else (page - 1) * limit
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.order_by(PropertySearch.fts.c.rank, Property.id)
+        results = db.execute(query.offset(offset).limit(limit + 1)).all()
+    elif cursor:
+        results = _keyset_results(db, query, sort_column, order == 'desc', after, limit + 1)
     else:
-        query = query.order_by(asc(sort_column))
+        direction = desc if order == 'desc' else asc
+        query = query.order_by(direction(sort_column), direction(Property.id))
+        results = db.execute(query.offset((page - 1) * limit).limit(limit + 1)).all()
     
-    # Apply pagination
-    offset = (page - 1) * limit
-    results = query.offset(offset).limit(limit).all()
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        if by_relevance:
+            next_cursor = _encode_cursor(sort, order, offset + limit, 0)
+        else:
+            next_cursor = _encode_cursor(sort, order, last.sort_key, last.id)
     
-    # Format response
-    data = []
-    for prop, lead_status, lead_id in results:
-        prop_dict = prop.to_dict()
-        prop_dict['lead_status'] = lead_status
-        prop_dict['lead_id'] = lead_id
-        data.append(prop_dict)
-    
-    return {
-        "data": data,
+    # Rows go straight to JSON, skipping FastAPI's encoder walk
+    return FastJSONResponse({
+        "data": row_dicts(columns, results),
         "total": total,
-        "page": page,
+        "total_estimated": total_estimated,
+        "page": None if cursor else page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit
-    }
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor
+    })
 
 
 @router.get("/stats")
@@ -191,6 +324,16 @@ def get_use_types(db: Session = Depends(get_db)):
     return [t[0] for t in types if t[0]]
 
 
+@router.get("/suggest")
+def suggest_properties(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """Autocomplete folios, owners and addresses starting with the typed text"""
+    return PropertySuggest.suggest(db, q, limit)
+
+
 @router.get("/{folio_number}")
 def get_property(folio_number: str, db: Session = Depends(get_db)):
     """Get a single property by folio number"""
@@ -0,0 +1,44 @@
+from typing import Iterable, List
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import DateTime
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard json module is used instead
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson when it is installed
+    
+    Return it from a route, with content already made of dicts, lists,
+    strings and numbers, so FastAPI doesn't walk the content with
+    jsonable_encoder first. orjson writes NaN and infinite floats as null.
+    """
+    
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+def row_dicts(columns: list, rows: Iterable) -> List[dict]:
+    """
+    Rows of a Core select of columns (possibly with more after them) as
+    dicts keyed by column name
+    
+    Datetimes become str(), as the models' to_dict methods write them.
+    """
+    names = [column.name for column in columns]
+    dates = [index for index, column in enumerate(columns) if isinstance(column.type, DateTime)]
+    result = []
+    for row in rows:
+        if dates:
+            row = list(row)
+            for index in dates:
+                if row[index] is not None:
+                    row[index] = str(row[index])
+        result.append(dict(zip(names, row)))
+    return result
@@ -1,5 +1,13 @@
 from .csv_service import CSVService
 from .letter_service import LetterService
+from .import_job_service import ImportJobService, ImportCancelled
+from .data_version_service import DataVersionService
+from .lead_service import LeadService
+from .export_cache import ExportCache
+from .count_cache import CountCache
+from .property_search import PropertySearch
+from .property_suggest import PropertySuggest
+from .index_advisor import IndexAdvisor
 
 
 
@@ -0,0 +1,188 @@
+import io
+from typing import Generator, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Leading bytes of a Parquet file
+PARQUET_MAGIC = b'PAR1'
+
+# Export formats besides CSV: file suffix and media type
+COLUMNAR_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+PARQUET_COMPRESSIONS = ('zstd', 'snappy', 'gzip', 'lz4', 'brotli', 'none')
+
+
+def pyarrow():
+    """Import pyarrow, which the Parquet and Arrow formats need"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet and Arrow formats require the pyarrow package (pip install pyarrow)")
+    return pyarrow
+
+
+def is_parquet(stream) -> bool:
+    """True if a buffered binary stream starts with the Parquet magic bytes"""
+    peek = getattr(stream, 'peek', None)
+    return bool(peek) and peek(4)[:4] == PARQUET_MAGIC
+
+
+class ParquetSource:
+    """
+    Read the columns of a Parquet file the importer uses, as text
+    
+    The importer's transform works on the strings read_csv produces, so each
+    batch is cast to text with nulls as NaN; the column mapping and derived
+    fields then work exactly as for a CSV.
+    """
+    
+    def __init__(self, stream, na_values: Iterable[str] = ()):
+        pa = pyarrow()
+        self._file = pa.parquet.ParquetFile(stream)
+        self.columns = self._file.schema_arrow.names
+        self.num_rows = self._file.metadata.num_rows
+        self._na_values = list(na_values)
+    
+    def frames(
+        self,
+        positions: Iterable[int],
+        batch_size: int,
+        start_row: int = 0
+    ) -> Generator[tuple, None, None]:
+        """
+        Yield (DataFrame of the given column positions, rows, rows read so far)
+        
+        Starts at start_row, skipping whole row groups before it.
+        """
+        pa = pyarrow()
+        positions = list(positions)
+        names = [self.columns[position] for position in positions]
+        
+        # Row groups wholly before start_row aren't read at all
+        metadata = self._file.metadata
+        first_group, group_start = 0, 0
+        while first_group < metadata.num_row_groups:
+            group_rows = metadata.row_group(first_group).num_rows
+            if group_start + group_rows > start_row:
+                break
+            group_start += group_rows
+            first_group += 1
+        
+        skip = start_row - group_start
+        rows_read = group_start
+        batches = self._file.iter_batches(
+            batch_size=batch_size,
+            row_groups=range(first_group, metadata.num_row_groups),
+            columns=names,
+            use_pandas_metadata=False
+        )
+        for batch in batches:
+            rows_read += batch.num_rows
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            if skip:
+                batch = batch.slice(skip)
+                skip = 0
+            yield self._as_text(pa, batch, names), batch.num_rows, rows_read
+    
+    def _as_text(self, pa, batch, names: list) -> pd.DataFrame:
+        frame = {}
+        for position, name in enumerate(names):
+            column = batch.column(position)
+            if not pa.types.is_string(column.type):
+                column = column.cast(pa.string())
+            values = pd.Series(column.to_numpy(zero_copy_only=False), dtype=object)
+            frame[position] = values.where(values.notna() & ~values.isin(self._na_values), np.nan)
+        return pd.DataFrame(frame)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that collects what the writer produces until it is drained"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def arrow_schema(columns: list):
+    """Arrow schema for SQLAlchemy columns, typed from their column types"""
+    pa = pyarrow()
+    types = {
+        'INTEGER': pa.int64(),
+        'FLOAT': pa.float64(),
+        'BOOLEAN': pa.bool_(),
+        'DATETIME': pa.timestamp('us'),
+    }
+    return pa.schema([
+        pa.field(column.name, types.get(column.type.__visit_name__.upper(), pa.string()))
+        for column in columns
+    ])
+
+
+def iter_columnar(
+    batches: Iterable[list],
+    columns: list,
+    fmt: str,
+    compression: Optional[str] = None
+) -> Generator[bytes, None, None]:
+    """
+    Encode batches of rows as a Parquet or Arrow IPC file, yielding it in pieces
+    
+    Each batch of rows becomes one Parquet row group or Arrow record batch,
+    and is yielded as soon as it has been encoded; neither writer seeks, so
+    the file can go straight to the client.
+    
+    Args:
+        batches: Lists of rows, each a tuple in column order
+        columns: The SQLAlchemy columns the rows hold
+        fmt: 'parquet' or 'arrow'
+        compression: Parquet codec (see PARQUET_COMPRESSIONS; default zstd)
+    """
+    pa = pyarrow()
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        codec = compression or 'zstd'
+        writer = pa.parquet.ParquetWriter(sink, schema, compression=codec if codec != 'none' else None)
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+    
+    try:
+        for rows in batches:
+            arrays = [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*rows), schema)
+            ]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
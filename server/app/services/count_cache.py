@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.orm import Session
+
+from ..models import Property
+from .data_version_service import DataVersionService
+
+
+class CountCache:
+    """
+    Total counts of filtered property listings, kept for the data version
+    they were counted at
+    
+    A count is keyed on the listing's filters, so paging through a listing
+    (or coming back to it) counts once until the data changes. The approx
+    mode estimates broad listings from a sample of the table instead of
+    counting every match.
+    """
+    
+    MAX_ENTRIES = 1000
+    
+    # The approx sample: blocks of consecutive ids spread over the table
+    SAMPLE_BLOCKS = 20
+    SAMPLE_BLOCK_SIZE = 1000
+    
+    # Fewer sampled matches than this makes too rough an estimate; count instead
+    MIN_SAMPLE_MATCHES = 100
+    
+    _counts = OrderedDict()
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def signature(filters: dict) -> str:
+        """Key for a set of listing filters; ones left unset (None) don't count"""
+        given = {name: value for name, value in filters.items() if value is not None}
+        data = json.dumps(given, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def count(
+        cls,
+        db: Session,
+        query: Select,
+        signature: str,
+        mode: str = 'exact'
+    ) -> Tuple[Optional[int], bool]:
+        """
+        Count the rows a filtered listing query returns
+        
+        Args:
+            db: Database session
+            query: The listing select with its filters applied
+            signature: signature() of those filters
+            mode: 'exact', 'approx' (an estimate will do) or 'none' (no count)
+        
+        Returns:
+            (total, whether it is an estimate); total is None for mode 'none'
+        """
+        if mode == 'none':
+            return None, False
+        
+        key = (DataVersionService.current(db), signature)
+        with cls._lock:
+            cached = cls._counts.get(key)
+            if cached is not None:
+                cls._counts.move_to_end(key)
+        if cached is not None and (mode == 'approx' or not cached[1]):
+            return cached
+        
+        result = None
+        if mode == 'approx':
+            result = cls._estimate(db, query)
+        if result is None:
+            result = (cls._count(db, query), False)
+        
+        with cls._lock:
+            cls._counts[key] = result
+            cls._counts.move_to_end(key)
+            while len(cls._counts) > cls.MAX_ENTRIES:
+                cls._counts.popitem(last=False)
+        return result
+    
+    @staticmethod
+    def _count(db: Session, query: Select) -> int:
+        """Number of rows a select returns"""
+        return db.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+    
+    @classmethod
+    def _estimate(cls, db: Session, query: Select) -> Optional[Tuple[int, bool]]:
+        """
+        Scale the matches among the sampled ids up to the whole table
+        
+        Returns None when the table is small enough to count, or the filters
+        match too little of the sample to estimate from.
+        """
+        low, high = db.query(func.min(Property.id), func.max(Property.id)).one()
+        if low is None or high - low + 1 <= cls.SAMPLE_BLOCKS * cls.SAMPLE_BLOCK_SIZE * 2:
+            return None
+        
+        step = (high - low + 1) // cls.SAMPLE_BLOCKS
+        sample = or_(*(
+            Property.id.between(start, start + cls.SAMPLE_BLOCK_SIZE - 1)
+            for start in range(low, low + step * cls.SAMPLE_BLOCKS, step)
+        ))
+        matches = cls._count(db, query.where(sample))
+        if matches < cls.MIN_SAMPLE_MATCHES:
+            return None
+        
+        sampled = db.query(func.count(Property.id)).filter(sample).scalar()
+        total = db.query(func.count(Property.id)).scalar()
+        return round(matches * total / sampled), True
@@ -2,12 +2,40 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import Generator, Optional, Callable
+from sqlalchemy import text, select, func, bindparam, inspect, MetaData
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Generator, Optional, Callable, Tuple, NamedTuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from collections import deque
+from functools import lru_cache
+from pandas._libs.parsers import STR_NA_VALUES
+import hashlib
+import csv
+import io
 import re
+import time
+import uuid
 
-from ..models import Property
+from ..models import Property, ImportCheckpoint
+from ..models.database import engine
 from ..config import settings
+from .import_sources import open_source
+from .import_rejects import RejectLog
+from .columnar import ParquetSource, is_parquet, iter_columnar
+from .data_version_service import DataVersionService
+from .property_search import PropertySearch
+from .index_advisor import IndexAdvisor
+
+
+class ImportPlan(NamedTuple):
+    """How to parse one CSV header layout, worked out once per layout"""
+    width: int  # columns in the header
+    usecols: tuple  # positions of the columns the importer reads
+    dtype: dict  # position -> dtype to parse it as
+    fields: tuple  # property field for each of usecols, in order
 
 
 class CSVService:
@@ -93,6 +121,55 @@ class CSVService:
         'documentary_stamps': 'stamp_amount_1',
     }
     
+    # Fields written to the properties table, in insert order
+    PROPERTY_FIELDS = [
+        'folio_number', 'name_line_1', 'name_line_2',
+        'mailing_address_line_1', 'mailing_address_line_2', 'mailing_city',
+        'mailing_state', 'mailing_zip',
+        'situs_street_number', 'situs_street_name', 'situs_street_type',
+        'situs_city', 'situs_zip',
+        'use_code', 'use_type', 'bldg_year_built', 'bldg_tot_sq_footage', 'beds', 'baths',
+        'just_land_value', 'just_building_value', 'just_value',
+        'homestead_flag', 'exemption_amount', 'owners_domicile',
+        'sale_date_1', 'deed_type_1', 'stamp_amount_1',
+        'estimated_purchase_price', 'calc_confidence', 'potential_equity', 'is_absentee_owner',
+    ]
+    
+    # How transform_chunk coerces the plain source fields
+    STRING_FIELDS = [
+        'name_line_1', 'name_line_2',
+        'mailing_address_line_1', 'mailing_address_line_2', 'mailing_city',
+        'mailing_state', 'mailing_zip',
+        'situs_street_number', 'situs_street_name', 'situs_street_type',
+        'situs_city', 'situs_zip', 'use_code', 'use_type',
+        'owners_domicile', 'sale_date_1', 'deed_type_1',
+    ]
+    # Source fields covered by the per-row fingerprint used for delta imports
+    HASH_FIELDS = PROPERTY_FIELDS[:PROPERTY_FIELDS.index('estimated_purchase_price')]
+    
+    INT_FIELDS = ['bldg_year_built', 'bldg_tot_sq_footage', 'beds']
+    FLOAT_FIELDS = ['baths', 'just_land_value', 'just_building_value', 'exemption_amount']
+    _NAN_SPELLINGS = ['nan', 'naN', 'nAn', 'nAN', 'Nan', 'NaN', 'NAn', 'NAN']
+    
+    # pd.read_csv options shared by header and chunk parsing
+    READ_OPTIONS = {
+        'dtype': str,  # Read all as string initially
+        'na_values': ['', 'NA', 'N/A', 'null', 'NULL'],
+        'keep_default_na': True,
+        'encoding': 'utf-8',
+        'encoding_errors': 'ignore',
+    }
+    
+    # Every spelling those options read as NaN (read_csv's defaults included);
+    # Parquet text is matched against the same set
+    NA_VALUES = frozenset(READ_OPTIONS['na_values']) | STR_NA_VALUES
+    
+    # Full-refresh imports load here, then replace properties in one transaction
+    STAGING_TABLE = 'properties_staging'
+    
+    # Compiled bulk upserts by target table, built on first use
+    _upsert_sql = {}
+    
     @staticmethod
     def normalize_column_name(col: str) -> str:
         """Normalize column name to match database fields"""
@@ -109,13 +186,13 @@ class CSVService:
     @staticmethod
     def calculate_doc_stamp_values(stamp_amount: float, deed_type: str) -> tuple:
         """Calculate estimated purchase price from documentary stamps"""
-        if not stamp_amount or stamp_amount <= 0:
+        if not stamp_amount or pd.isna(stamp_amount) or stamp_amount <= 0:
             return None, 'None'
         
         deed_type = (deed_type or '').upper()
         
         # Florida doc stamp rate: $0.70 per $100 = 0.007
-        estimated_price = round(stamp_amount / 0.007)
+        estimated_price = round(stamp_amount / settings.DOC_STAMP_RATE)
         
         if deed_type in ['WD', 'SWD']:  # Warranty Deed
             confidence = 'High' if deed_type == 'WD' else 'Medium'
@@ -124,39 +201,264 @@ class CSVService:
         
         return estimated_price, confidence
     
-    @staticmethod
-    def is_absentee_owner(row: pd.Series) -> bool:
-        """Determine if owner is absentee"""
+    @classmethod
+    def is_absentee_owner(cls, row: pd.Series) -> bool:
+        """Determine if owner is absentee, from its cleaned fields (missing ones read as 'nan')"""
+        def text(name: str) -> str:
+            value = cls._clean_string(row.get(name))
+            return 'nan' if value is None else value
+        
         # Check domicile state
-        domicile = str(row.get('owners_domicile', '')).upper()
-        if domicile and domicile != 'FL':
+        domicile = text('owners_domicile').upper()
+        if domicile and domicile != settings.ABSENTEE_HOME_STATE.upper():
             return True
         
         # Compare situs to mailing address
-        situs = f"{row.get('situs_street_number', '')} {row.get('situs_street_name', '')}".lower().strip()
-        mailing = f"{row.get('mailing_address_line_1', '')}".lower().strip()
+        situs = f"{text('situs_street_number')} {text('situs_street_name')}".lower().strip()
+        mailing = text('mailing_address_line_1').lower().strip()
         
         if situs and mailing and situs not in mailing and mailing not in situs:
             return True
         
         return False
     
+    @classmethod
+    def _build_property_data(cls, row: pd.Series) -> Optional[dict]:
+        """
+        Build insert-ready property data for a single CSV row
+        
+        This is the reference implementation of transform_chunk; it is also used
+        for the odd rows the columnar path can't reproduce exactly.
+        Returns None for rows without a folio number.
+        """
+        folio = str(row.get('folio_number', '')).strip()
+        if not folio or folio == 'nan':
+            return None
+        
+        # Calculate derived fields
+        stamp_amount = pd.to_numeric(row.get('stamp_amount_1'), errors='coerce')
+        deed_type = cls._clean_string(row.get('deed_type_1'))
+        est_price, confidence = cls.calculate_doc_stamp_values(stamp_amount, deed_type)
+        
+        just_value = pd.to_numeric(row.get('just_value'), errors='coerce')
+        potential_equity = (just_value - est_price) if est_price and just_value else None
+        
+        return {
+            'folio_number': folio,
+            'name_line_1': cls._clean_string(row.get('name_line_1')),
+            'name_line_2': cls._clean_string(row.get('name_line_2')),
+            'mailing_address_line_1': cls._clean_string(row.get('mailing_address_line_1')),
+            'mailing_address_line_2': cls._clean_string(row.get('mailing_address_line_2')),
+            'mailing_city': cls._clean_string(row.get('mailing_city')),
+            'mailing_state': cls._clean_string(row.get('mailing_state')),
+            'mailing_zip': cls._clean_string(row.get('mailing_zip')),
+            'situs_street_number': cls._clean_string(row.get('situs_street_number')),
+            'situs_street_name': cls._clean_string(row.get('situs_street_name')),
+            'situs_street_type': cls._clean_string(row.get('situs_street_type')),
+            'situs_city': cls._clean_string(row.get('situs_city')),
+            'situs_zip': cls._clean_string(row.get('situs_zip')),
+            'use_code': cls._clean_string(row.get('use_code')),
+            'use_type': cls._clean_string(row.get('use_type')),
+            'bldg_year_built': cls._to_int(row.get('bldg_year_built')),
+            'bldg_tot_sq_footage': cls._to_int(row.get('bldg_tot_sq_footage')),
+            'beds': cls._to_int(row.get('beds')),
+            'baths': cls._to_float(row.get('baths')),
+            'just_land_value': cls._to_float(row.get('just_land_value')),
+            'just_building_value': cls._to_float(row.get('just_building_value')),
+            'just_value': just_value if pd.notna(just_value) else None,
+            'homestead_flag': cls._to_bool(row.get('homestead_flag')),
+            'exemption_amount': cls._to_float(row.get('exemption_amount')),
+            'owners_domicile': cls._clean_string(row.get('owners_domicile')),
+            'sale_date_1': cls._clean_string(row.get('sale_date_1')),
+            'deed_type_1': cls._clean_string(row.get('deed_type_1')),
+            'stamp_amount_1': stamp_amount if pd.notna(stamp_amount) else None,
+            'estimated_purchase_price': est_price,
+            'calc_confidence': confidence,
+            'potential_equity': potential_equity,
+            'is_absentee_owner': cls.is_absentee_owner(row),
+        }
+    
+    @classmethod
+    def transform_chunk(cls, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
+        """
+        Turn a renamed CSV chunk into insert-ready property columns
+        
+        Column-wise equivalent of _build_property_data. Rows holding values the
+        vectorized coercion can't reproduce exactly (infinities, numbers only
+        Python's float() understands) go through the per-row builder instead.
+        
+        Args:
+            chunk: DataFrame read with dtype=str and columns already mapped
+        
+        Returns:
+            (DataFrame of PROPERTY_FIELDS with None for nulls, list of row errors)
+        """
+        chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+        missing = pd.Series(np.nan, index=chunk.index, dtype=object)
+        
+        def column(name: str) -> pd.Series:
+            return chunk[name] if name in chunk.columns else missing
+        
+        folio = column('folio_number').str.strip()
+        keep = (folio.notna() & (folio != '') & (folio != 'nan')).to_numpy()
+        fallback = np.zeros(len(chunk), dtype=bool)
+        data = {'folio_number': folio.to_numpy(dtype=object)}
+        
+        for field in cls.STRING_FIELDS:
+            data[field] = cls._clean_string_column(column(field))
+        
+        for field in cls.INT_FIELDS:
+            values, odd = cls._parse_number_column(column(field), ',')
+            odd |= np.abs(values) >= 2 ** 63
+            fallback |= odd
+            null = np.isnan(values)
+            ints = np.trunc(np.where(odd | null, 0, values)).astype(np.int64)
+            data[field] = cls._nan_to_none(ints.astype(object), null)
+        
+        for field in cls.FLOAT_FIELDS:
+            values, odd = cls._parse_number_column(column(field), ',$')
+            fallback |= odd
+            data[field] = cls._nan_to_none(values.astype(object), np.isnan(values))
+        
+        homestead = column('homestead_flag').str.lower().isin(['yes', 'true', '1', 'y'])
+        data['homestead_flag'] = homestead.to_numpy(dtype=object)
+        
+        stamp = pd.to_numeric(column('stamp_amount_1'), errors='coerce').to_numpy(dtype='float64')
+        just_value = pd.to_numeric(column('just_value'), errors='coerce').to_numpy(dtype='float64')
+        fallback |= np.isinf(stamp) | np.isinf(just_value)
+        data['just_value'] = cls._nan_to_none(just_value.astype(object), np.isnan(just_value))
+        data['stamp_amount_1'] = cls._nan_to_none(stamp.astype(object), np.isnan(stamp))
+        
+        data.update(cls.derive_fields(
+            stamp,
+            just_value,
+            cls._stored_text(data['deed_type_1'], missing=''),
+            cls._stored_text(data['owners_domicile']),
+            cls._stored_text(data['situs_street_number']) + ' ' + cls._stored_text(data['situs_street_name']),
+            cls._stored_text(data['mailing_address_line_1'])
+        ))
+        
+        vectorized = keep & ~fallback
+        records = pd.DataFrame(
+            {field: data[field][vectorized] for field in cls.PROPERTY_FIELDS},
+            index=chunk.index[vectorized]
+        )
+        
+        errors = []
+        if (keep & fallback).any():
+            slow_rows = {}
+            for idx in chunk.index[keep & fallback]:
+                row = chunk.loc[idx]
+                try:
+                    property_data = cls._build_property_data(row)
+                    slow_rows[idx] = {
+                        key: value.item() if isinstance(value, np.generic) else value
+                        for key, value in property_data.items()
+                    }
+                except Exception as e:
+                    errors.append({
+                        'row': idx,
+                        'folio': row.get('folio_number'),
+                        'error': str(e)
+                    })
+            if slow_rows:
+                slow = pd.DataFrame.from_dict(slow_rows, orient='index', columns=cls.PROPERTY_FIELDS)
+                slow = slow.astype(object).where(slow.notna(), None)
+                records = pd.concat([records, slow]).sort_index()
+        
+        return records, errors
+    
+    @classmethod
+    def derive_fields(
+        cls,
+        stamp: np.ndarray,
+        just_value: np.ndarray,
+        deed_type: pd.Series,
+        domicile: pd.Series,
+        situs: pd.Series,
+        mailing: pd.Series
+    ) -> dict:
+        """
+        Column-wise calculate_doc_stamp_values, equity and is_absentee_owner
+        
+        Shared by the import transform and recompute_derived_fields, so both
+        apply settings.DOC_STAMP_RATE and settings.ABSENTEE_HOME_STATE to the
+        same cleaned values (see _stored_text).
+        
+        Args:
+            stamp: Doc stamp amounts as float64, NaN where missing
+            just_value: Just values as float64, NaN where missing
+            deed_type: Cleaned deed types, '' where missing
+            domicile: Cleaned owner domicile, 'nan' where missing
+            situs: Situs "number name" from the cleaned parts
+            mailing: Cleaned mailing address line 1, 'nan' where missing
+        
+        Returns:
+            dict of the four derived columns as object arrays, None for nulls
+        """
+        has_stamp = np.nan_to_num(stamp, nan=0.0) > 0
+        est_price = np.where(has_stamp, np.round(stamp / settings.DOC_STAMP_RATE), np.nan)
+        
+        deed_type = deed_type.str.upper().to_numpy(dtype=object)
+        confidence = np.where(deed_type == 'WD', 'High', np.where(deed_type == 'SWD', 'Medium', 'Low'))
+        confidence = np.where(has_stamp, confidence, 'None').astype(object)
+        
+        has_equity = has_stamp & (est_price != 0) & (just_value != 0)
+        equity = np.where(has_equity, just_value - est_price, np.nan)
+        
+        # Absentee: out-of-state domicile, or situs and mailing address unrelated
+        domicile = domicile.str.upper()
+        absentee = ((domicile != '') & (domicile != settings.ABSENTEE_HOME_STATE.upper())).to_numpy()
+        situs = situs.str.lower().str.strip()
+        mailing = mailing.str.lower().str.strip()
+        absentee |= np.fromiter(
+            (bool(s and m and s not in m and m not in s) for s, m in zip(situs, mailing)),
+            dtype=bool,
+            count=len(situs)
+        )
+        
+        return {
+            'estimated_purchase_price': cls._nan_to_none(est_price.astype(object), np.isnan(est_price)),
+            'calc_confidence': confidence,
+            'potential_equity': cls._nan_to_none(equity.astype(object), np.isnan(equity)),
+            'is_absentee_owner': absentee.astype(object),
+        }
+    
     @classmethod
     def import_csv(
         cls,
         db: Session,
         file_path: Path,
         chunk_size: int = 5000,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        resume: bool = True,
+        full_refresh: bool = False
     ) -> dict:
         """
         Import CSV file into database using chunked processing
         
+        With more than one worker, chunks are parsed and transformed in a process
+        pool while this thread writes the finished chunks to SQLite in file order.
+        
+        Progress is checkpointed in the same transaction as each chunk, keyed by
+        the file's content, so an interrupted import of the same file picks up
+        after the last committed chunk.
+        
+        Rejected rows are appended to a reject file (see RejectLog) with the
+        reason and the original line; only the first 100 are returned.
+        
         Args:
             db: Database session
             file_path: Path to CSV file
             chunk_size: Number of rows to process at once
             progress_callback: Optional callback for progress updates
+            workers: Parser processes (defaults to settings.IMPORT_WORKERS; 1 = in-process)
+            queue_depth: Chunks in flight at once in parallel mode, which bounds memory
+                (defaults to settings.IMPORT_QUEUE_DEPTH)
+            resume: Continue from an unfinished checkpoint for this file, if any
+            full_refresh: Replace the whole table with the file's rows (see import_stream)
             
         Returns:
             dict with import statistics
@@ -166,129 +468,893 @@ class CSVService:
         if not file_path.exists():
             raise FileNotFoundError(f"CSV file not found: {file_path}")
         
-        # Get total row count for progress
-        total_rows = sum(1 for _ in open(file_path, 'r', encoding='utf-8', errors='ignore')) - 1
+        with open(file_path, 'rb') as stream:
+            return cls.import_stream(
+                db, stream,
+                total_bytes=file_path.stat().st_size,
+                source_name=file_path.name,
+                source_key=cls.source_key(file_path),
+                source_mtime=file_path.stat().st_mtime,
+                chunk_size=chunk_size,
+                progress_callback=progress_callback,
+                workers=workers,
+                queue_depth=queue_depth,
+                resume=resume,
+                full_refresh=full_refresh
+            )
+    
+    @classmethod
+    def import_stream(
+        cls,
+        db: Session,
+        stream,
+        total_bytes: Optional[int] = None,
+        source_name: Optional[str] = None,
+        source_key: Optional[str] = None,
+        source_mtime: Optional[float] = None,
+        chunk_size: int = 5000,
+        progress_callback: Optional[Callable] = None,
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        resume: bool = True,
+        full_refresh: bool = False
+    ) -> dict:
+        """
+        Import CSV data from a binary stream as it is read
+        
+        Takes the same options as import_csv. Chunks are upserted as soon as
+        they have been read, so the source can still be arriving. gzip, ZIP
+        and zstd input is decompressed on the fly (see open_source). Parquet
+        files are read through the same column mapping and transform (see
+        ParquetSource); they need a seekable stream, and need pyarrow.
+        
+        Args:
+            stream: Binary file-like object positioned at the header row
+            total_bytes: Size of the source (compressed, if it is) if known,
+                for percent and ETA
+            source_name: Name recorded on the checkpoint
+            source_key: Content identity for checkpointing; without one nothing
+                is checkpointed. Resuming also needs a seekable stream.
+            source_mtime: Modification time of the source file, if it is one;
+                a checkpoint for the same file name with a different mtime is
+                not resumed
+            full_refresh: Load every row into a staging table instead, then swap
+                it in for properties at the end. Readers keep seeing the old
+                table until the swap commits; properties missing from the file
+                are removed unless a lead or letter refers to them.
+        """
+        # Progress is driven by bytes consumed; the row total is only known at the end
+        started = time.monotonic()
+        
+        # Checkpoint offsets are in the decompressed CSV; progress follows the source
+        stream, source_position = open_source(stream)
+        position = source_position or (lambda: checkpoint.byte_offset)
+        
+        checkpoint = cls._start_checkpoint(
+            db, source_key, source_name, source_mtime, full_refresh,
+            resume and stream.seekable() and (not full_refresh or cls._staging_exists(db))
+        )
+        resumed_rows = checkpoint.rows_processed
+        errors = []  # The first rejects of this run; all of them go to the reject file
+        if full_refresh and not resumed_rows:
+            cls._create_staging_table(db)
+        elif not full_refresh and not resumed_rows and db.query(Property.id).first() is None:
+            # A first load indexes the search once at the end instead of row by row
+            if PropertySearch.suspend(db.connection()):
+                db.commit()
+        
+        if is_parquet(stream):
+            # Parquet offsets count rows; progress is their share of the file
+            source = ParquetSource(stream, cls.NA_VALUES)
+            columns = cls._check_columns(source.columns)
+            blocks = source.frames(cls.import_plan(columns).usecols, chunk_size, checkpoint.rows_processed)
+            transform = cls.transform_frame
+            offset = checkpoint.rows_processed
+            if total_bytes and source.num_rows:
+                position = lambda: total_bytes * checkpoint.byte_offset // source.num_rows
+        else:
+            columns, header_bytes = cls._read_header(stream)
+            offset = header_bytes
+            if checkpoint.byte_offset > header_bytes:
+                stream.seek(checkpoint.byte_offset)
+                offset = checkpoint.byte_offset
+            blocks = cls._iter_blocks(stream, chunk_size, offset)
+            transform = cls.transform_block
+        checkpoint.byte_offset = offset
+        resumed_bytes = position() if resumed_rows else 0
+        
+        # Read CSV in chunks
+        with RejectLog(checkpoint.reject_id, checkpoint.reject_bytes or 0) as rejects:
+            for bytes_read, rows, records, chunk_errors, skipped in cls._transformed_chunks(
+                blocks, transform, columns, workers, queue_depth,
+                first_row=checkpoint.rows_processed,
+                known_hashes=None if full_refresh else lambda folios: cls._existing_hashes(db, folios)
+            ):
+                errors.extend(
+                    {key: value for key, value in error.items() if key != 'line'}
+                    for error in chunk_errors[:100 - len(errors)]
+                )
+                checkpoint.reject_bytes = rejects.write(chunk_errors)
+                
+                chunk_imported, chunk_updated, chunk_unchanged = cls._upsert_records(
+                    db, records, cls.STAGING_TABLE if full_refresh else None
+                )
+                checkpoint.imported += chunk_imported
+                checkpoint.updated += chunk_updated
+                checkpoint.unchanged += chunk_unchanged + skipped
+                checkpoint.error_count += len(chunk_errors)
+                checkpoint.rows_processed += rows
+                checkpoint.chunk_number += 1
+                checkpoint.byte_offset = bytes_read
+                if (chunk_imported or chunk_updated) and not full_refresh:
+                    DataVersionService.bump(db)
+                
+                # Commit each chunk together with its checkpoint
+                db.commit()
+                
+                # Report progress
+                if progress_callback:
+                    progress_callback(cls._progress(
+                        checkpoint.rows_processed, position(), total_bytes, started,
+                        resumed_rows=resumed_rows, resumed_bytes=resumed_bytes,
+                        **cls._checkpoint_counts(checkpoint)
+                    ))
+        
+        swap = cls._swap_staging_table(db) if full_refresh else {}
+        if not full_refresh and PropertySearch.is_ready(db):
+            # Rebuilds the search index if a first load suspended it
+            PropertySearch.ensure_index(db.connection())
+        
+        checkpoint.status = 'complete'
+        db.commit()
+        
+        processed = checkpoint.rows_processed
+        if progress_callback:
+            progress_callback(cls._progress(
+                processed, position(), position(), started, total_rows=processed,
+                resumed_rows=resumed_rows, resumed_bytes=resumed_bytes,
+                **cls._checkpoint_counts(checkpoint)
+            ))
+        
+        return {
+            'total_rows': processed,
+            'imported': checkpoint.imported,
+            'updated': checkpoint.updated,
+            'unchanged': checkpoint.unchanged,
+            'resumed_from_row': resumed_rows or None,
+            'errors': errors,
+            'error_count': checkpoint.error_count,
+            'reject_id': checkpoint.reject_id,
+            **swap
+        }
+    
+    @staticmethod
+    def source_key(file_path: Path, sample_size: int = 65536, samples: int = 16) -> str:
+        """
+        Identify a CSV file by its content rather than its path
+        
+        Downloads and uploads land in fresh temp files, so the key hashes the
+        size with samples blocks of sample_size bytes spread evenly from the
+        first to the last, or the whole file if it is no bigger than that.
+        """
+        file_path = Path(file_path)
+        size = file_path.stat().st_size
+        digest = hashlib.sha256(str(size).encode())
+        with open(file_path, 'rb') as f:
+            if size <= sample_size * samples:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            else:
+                step = (size - sample_size) // (samples - 1)
+                for i in range(samples):
+                    f.seek(i * step)
+                    digest.update(f.read(sample_size))
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _source_changed(
+        checkpoint: ImportCheckpoint,
+        source_name: Optional[str],
+        source_mtime: Optional[float]
+    ) -> bool:
+        """True if the checkpoint was taken from this same file before it was last modified"""
+        return (
+            source_mtime is not None and checkpoint.source_mtime is not None
+            and checkpoint.source_name == source_name
+            and checkpoint.source_mtime != source_mtime
+        )
+    
+    @classmethod
+    def _start_checkpoint(
+        cls,
+        db: Session,
+        source_key: Optional[str],
+        source_name: Optional[str],
+        source_mtime: Optional[float],
+        full_refresh: bool,
+        resume: bool
+    ) -> ImportCheckpoint:
+        """
+        Return the checkpoint to continue from, resetting it unless resuming a running import
+        
+        Without a source_key the checkpoint is transient: it only carries the
+        counters and is never saved. The key only samples the file, so the
+        same file rewritten since (a different mtime) starts over too.
+        """
+        if source_key is None:
+            checkpoint = ImportCheckpoint()
+        else:
+            checkpoint = db.query(ImportCheckpoint).filter(
+                ImportCheckpoint.source_key == source_key
+            ).first()
+        
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(source_key=source_key)
+            db.add(checkpoint)
+        elif (
+            resume and checkpoint.status == 'running'
+            and bool(checkpoint.full_refresh) == full_refresh
+            and not cls._source_changed(checkpoint, source_name, source_mtime)
+        ):
+            checkpoint.reject_id = checkpoint.reject_id or uuid.uuid4().hex
+            return checkpoint
+        
+        checkpoint.source_name = source_name
+        checkpoint.source_mtime = source_mtime
+        checkpoint.status = 'running'
+        checkpoint.full_refresh = full_refresh
+        checkpoint.byte_offset = 0
+        checkpoint.chunk_number = 0
+        checkpoint.rows_processed = 0
+        checkpoint.imported = 0
+        checkpoint.updated = 0
+        checkpoint.unchanged = 0
+        checkpoint.error_count = 0
+        checkpoint.reject_id = uuid.uuid4().hex
+        checkpoint.reject_bytes = 0
+        db.commit()
+        return checkpoint
+    
+    @staticmethod
+    def _checkpoint_counts(checkpoint: ImportCheckpoint) -> dict:
+        return {
+            'imported': checkpoint.imported,
+            'updated': checkpoint.updated,
+            'unchanged': checkpoint.unchanged,
+            'error_count': checkpoint.error_count,
+            'reject_id': checkpoint.reject_id,
+        }
+    
+    @staticmethod
+    def has_unfinished_import(db: Session, source_key: Optional[str]) -> bool:
+        """True if an import of this source was interrupted before its last chunk was committed"""
+        if source_key is None:
+            return False
+        return db.query(ImportCheckpoint).filter(
+            ImportCheckpoint.source_key == source_key,
+            ImportCheckpoint.status == 'running'
+        ).first() is not None
+    
+    @staticmethod
+    def _progress(
+        processed: int,
+        bytes_read: int,
+        total_bytes: Optional[int],
+        started: float,
+        total_rows: Optional[int] = None,
+        resumed_rows: int = 0,
+        resumed_bytes: int = 0,
+        **counts
+    ) -> dict:
+        """
+        Build a progress_callback payload
+        
+        percent and eta_seconds come from the share of the source consumed so
+        far; 'total' stays None (with an extrapolated 'estimated_total') until
+        the last chunk has been read. Rows and bytes already done before a
+        resume count toward the totals but not toward this run's rate.
+        """
+        elapsed = time.monotonic() - started
+        fraction = min(1.0, bytes_read / total_bytes) if total_bytes else None
+        run_fraction = None
+        if total_bytes and total_bytes > resumed_bytes:
+            run_fraction = (bytes_read - resumed_bytes) / (total_bytes - resumed_bytes)
+        
+        progress = {
+            'processed': processed,
+            'total': total_rows,
+            'estimated_total': total_rows,
+            'bytes_read': bytes_read,
+            'total_bytes': total_bytes,
+            'percent': None,
+            'elapsed_seconds': round(elapsed, 1),
+            'eta_seconds': None,
+            'rows_per_second': round((processed - resumed_rows) / elapsed) if elapsed > 0 else None,
+        }
+        if fraction:
+            progress['percent'] = min(100, round(fraction * 100))
+        if run_fraction:
+            progress['eta_seconds'] = round(elapsed * (1 - run_fraction) / run_fraction, 1)
+            if total_rows is None:
+                progress['estimated_total'] = round(processed / fraction)
+        
+        progress.update(counts)
+        return progress
+    
+    @classmethod
+    def read_columns(cls, file_path: Path) -> list:
+        """Read and validate the header of a CSV (or Parquet) file without importing it"""
+        with open(file_path, 'rb') as stream:
+            stream = open_source(stream)[0]
+            if is_parquet(stream):
+                return cls._check_columns(ParquetSource(stream).columns)
+            return cls._read_header(stream)[0]
+    
+    @classmethod
+    def parse_header(cls, data: bytes, final: bool = False) -> Optional[list]:
+        """
+        Validate the header at the start of a CSV that is still arriving
+        
+        Returns the raw column names, or None while the header record is
+        incomplete. Pass final=True once no more data will come.
+        """
+        if final:
+            return cls._read_header(io.BytesIO(data))[0]
+        
+        end = 0
+        quoted = False
+        for line in io.BytesIO(data):
+            end += len(line)
+            if not line.endswith(b'\n'):
+                return None
+            quoted = cls._in_quoted_field(line, quoted)
+            if not quoted:
+                return cls._read_header(io.BytesIO(data[:end]))[0]
+        return None
+    
+    @classmethod
+    def _read_header(cls, stream) -> Tuple[list, int]:
+        """
+        Read the header record from a binary CSV stream
+        
+        Returns the raw column names and the header size in bytes, leaving the
+        stream at the first data row.
+        """
+        header = b''
+        quoted = False
+        for line in stream:
+            header += line
+            quoted = cls._in_quoted_field(line, quoted)
+            if not quoted:
+                break
+        
+        if not header.strip():
+            raise ValueError("CSV file is empty")
+        
+        columns = list(pd.read_csv(io.BytesIO(header), nrows=0, **cls.READ_OPTIONS).columns)
+        return cls._check_columns(columns), len(header)
+    
+    @classmethod
+    def _check_columns(cls, columns: list) -> list:
+        """Make sure a source's columns include the folio number; returns them"""
+        if 'folio_number' not in cls.import_plan(columns).fields:
+            raise ValueError("CSV must contain a folio_number (or parcel_id) column")
+        return columns
+    
+    @classmethod
+    def import_plan(cls, columns: list) -> ImportPlan:
+        """
+        Work out which source columns to parse and what they map to
+        
+        Plans are cached by header, so chunks, worker processes and repeated
+        imports of the same layout only map the columns once.
+        """
+        return cls._build_import_plan(tuple(columns))
+    
+    @classmethod
+    @lru_cache(maxsize=32)
+    def _build_import_plan(cls, columns: tuple) -> ImportPlan:
+        # Only the source fields feed the transform and the row fingerprint;
+        # the first column mapping to a field wins. Everything stays text,
+        # since the transform parses numbers itself.
+        wanted = set(cls.HASH_FIELDS)
+        usecols = []
+        fields = []
+        for position, column in enumerate(columns):
+            field = cls.COLUMN_MAPPING.get(cls.normalize_column_name(column))
+            if field in wanted and field not in fields:
+                usecols.append(position)
+                fields.append(field)
+        
+        return ImportPlan(
+            width=len(columns),
+            usecols=tuple(usecols),
+            dtype={position: str for position in usecols},
+            fields=tuple(fields),
+        )
+    
+    @classmethod
+    def _in_quoted_field(cls, line: bytes, quoted: bool = False) -> bool:
+        """
+        Whether a CSV line ends inside a quoted field
+        
+        quoted says whether the line starts inside a quoted field.
+        """
+        if not quoted and b'"' not in line:
+            return False
+        return cls._scan_fields(line, quoted)[0]
+    
+    @staticmethod
+    def _scan_fields(data: bytes, quoted: bool = False) -> Tuple[bool, int]:
+        """
+        Scan CSV data the way read_csv's tokenizer does
+        
+        A quote only opens a quoted field at the start of the field, "" inside
+        one is an escaped quote, and any other quote (e.g. 12" in an unquoted
+        field) is just a character. quoted says whether the data starts inside
+        a quoted field.
+        
+        Returns:
+            (whether the data ends inside a quoted field, field separators
+            outside quoted fields)
+        """
+        if not quoted and b'"' not in data:
+            return False, data.count(b',')
+        
+        position = 0
+        separators = 0
+        field_start = not quoted
+        while True:
+            if quoted:
+                end = data.find(b'"', position)
+                if end < 0:
+                    return True, separators
+                if data.startswith(b'"', end + 1):
+                    position = end + 2
+                    continue
+                quoted, field_start, position = False, False, end + 1
+            elif field_start and data.startswith(b'"', position):
+                quoted, position = True, position + 1
+            else:
+                comma = data.find(b',', position)
+                if comma < 0:
+                    return False, separators
+                separators += 1
+                field_start, position = True, comma + 1
+    
+    @classmethod
+    def _malformed_records(cls, records: list, plan: ImportPlan, first_row: int) -> list:
+        """
+        Row errors for records read_csv would misparse or refuse
+        
+        A record with more fields than the header would have its extra fields
+        dropped and one with fewer padded with nulls, shifting or losing
+        values, so both are rejected. So is a quoted field left open at the
+        end of the file, which read_csv refuses along with the whole block.
+        """
+        errors = []
+        for position, record in enumerate(records):
+            quoted, separators = cls._scan_fields(record)
+            if quoted:
+                reason = "Unterminated quoted field"
+            elif separators + 1 != plan.width:
+                reason = f"Expected {plan.width} fields, got {separators + 1}"
+            else:
+                continue
+            line = record.rstrip(b'\r\n').decode('utf-8', 'replace')
+            errors.append({
+                'row': first_row + position,
+                'folio': cls._record_folio(line, plan),
+                'error': reason,
+                'line': line,
+            })
+        return errors
+    
+    @staticmethod
+    def _record_folio(line: str, plan: ImportPlan) -> Optional[str]:
+        """Best-effort folio number of a malformed record, for its reject entry"""
+        if 'folio_number' not in plan.fields:
+            return None
+        position = plan.usecols[plan.fields.index('folio_number')]
+        try:
+            fields = next(csv.reader([line]))
+        except (csv.Error, StopIteration):
+            return None
+        folio = fields[position].strip() if position < len(fields) else ''
+        return folio or None
+    
+    @classmethod
+    def _iter_records(cls, lines) -> Generator[bytes, None, None]:
+        """
+        Join raw CSV lines into records
+        
+        Quoted fields spanning several lines stay in one record, and blank lines
+        are dropped.
+        """
+        record = b''
+        quoted = False
+        for line in lines:
+            record += line
+            quoted = cls._in_quoted_field(line, quoted)
+            if quoted:
+                continue
+            if record.strip(b'\r\n'):
+                yield record
+            record = b''
+        
+        if record.strip(b'\r\n'):
+            yield record
+    
+    @classmethod
+    def _iter_blocks(cls, stream, chunk_size: int, offset: int = 0) -> Generator[Tuple[bytes, int, int], None, None]:
+        """
+        Split a binary CSV stream into blocks of up to chunk_size records
+        
+        Yields (block bytes, number of records, stream offset after the block),
+        counting offsets from the given starting offset.
+        """
+        def counted_lines():
+            nonlocal offset
+            for line in stream:
+                offset += len(line)
+                yield line
+        
+        records = []
+        for record in cls._iter_records(counted_lines()):
+            records.append(record)
+            if len(records) >= chunk_size:
+                yield b''.join(records), len(records), offset
+                records = []
+        
+        if records:
+            yield b''.join(records), len(records), offset
+    
+    @classmethod
+    def transform_block(
+        cls,
+        columns: list,
+        block: bytes,
+        first_row: int,
+        known_hashes: Optional[Callable] = None
+    ) -> Tuple[int, list, list, int]:
+        """
+        Parse and transform one block of raw CSV records
+        
+        Runs in the import worker processes, so it only takes and returns plain,
+        picklable values.
+        
+        Records whose field count doesn't match the header are rejected
+        before parsing (see _malformed_records), as are any read_csv still
+        can't tokenize; both go to the reject log with the original line.
+        
+        Returns:
+            transform_frame's result, with each row error's original line
+        """
+        plan = cls.import_plan(columns)
+        lines = list(cls._iter_records(io.BytesIO(block)))
+        malformed = cls._malformed_records(lines, plan, first_row)
+        row_numbers = None
+        if malformed:
+            rejected = {error['row'] for error in malformed}
+            row_numbers = [row for row in range(first_row, first_row + len(lines)) if row not in rejected]
+            block = b''.join(lines[row - first_row] for row in row_numbers)
+        
+        try:
+            chunk = cls._read_block(block, plan)
+        except pd.errors.ParserError:
+            # Reject just the records read_csv can't tokenize, one at a time
+            kept = []
+            for row in range(first_row, first_row + len(lines)) if row_numbers is None else row_numbers:
+                record = lines[row - first_row]
+                try:
+                    cls._read_block(record, plan)
+                except pd.errors.ParserError as e:
+                    line = record.rstrip(b'\r\n').decode('utf-8', 'replace')
+                    malformed.append({
+                        'row': row,
+                        'folio': cls._record_folio(line, plan),
+                        'error': f"Could not parse row: {e}",
+                        'line': line,
+                    })
+                else:
+                    kept.append(row)
+            row_numbers = kept
+            chunk = cls._read_block(b''.join(lines[row - first_row] for row in kept), plan)
+        
+        rows, records, errors, unchanged = cls.transform_frame(
+            columns, chunk, first_row, known_hashes, row_numbers
+        )
+        
+        for error in errors:
+            position = error['row'] - first_row
+            if 0 <= position < len(lines):
+                error['line'] = lines[position].rstrip(b'\r\n').decode('utf-8', 'replace')
+        if malformed:
+            errors = sorted(errors + malformed, key=lambda error: error['row'])
+        return rows + len(malformed), records, errors, unchanged
+    
+    @classmethod
+    def _read_block(cls, block: bytes, plan: ImportPlan) -> pd.DataFrame:
+        """Parse raw CSV records into the plan's columns, as text"""
+        return pd.read_csv(
+            io.BytesIO(block),
+            header=None,
+            names=range(plan.width),
+            usecols=plan.usecols,
+            index_col=False,
+            **{**cls.READ_OPTIONS, 'dtype': plan.dtype}
+        )
+    
+    @classmethod
+    def transform_frame(
+        cls,
+        columns: list,
+        chunk: pd.DataFrame,
+        first_row: int,
+        known_hashes: Optional[Callable] = None,
+        row_numbers: Optional[list] = None
+    ) -> Tuple[int, list, list, int]:
+        """
+        Transform one block of parsed source rows
+        
+        Args:
+            columns: The source's column names
+            chunk: The import plan's columns (usecols, in order) as text, NaN
+                for nulls
+            first_row: Row number of the block's first row
+            known_hashes: Optional lookup (folios -> {folio: source_hash}); rows
+                whose fingerprint matches are dropped before the transform
+            row_numbers: Row number of each row, when some rows of the block
+                were rejected before parsing; otherwise they count up from
+                first_row
+        
+        Returns:
+            (rows parsed, property records, row errors, rows dropped as unchanged)
+        """
+        plan = cls.import_plan(columns)
+        if row_numbers is None:
+            chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+        else:
+            chunk.index = pd.Index(row_numbers)
+        chunk.columns = plan.fields
+        rows = len(chunk)
+        
+        hashes = pd.Series(cls._row_hashes(chunk), index=chunk.index)
+        unchanged = 0
+        if known_hashes is not None and rows:
+            folios = chunk['folio_number'].str.strip()
+            known = known_hashes(folios.dropna().unique().tolist())
+            same = (folios.map(known) == hashes).to_numpy()
+            unchanged = int(same.sum())
+            chunk = chunk[~same]
+        
+        records, errors = cls.transform_chunk(chunk)
+        records['source_hash'] = hashes.loc[records.index].to_numpy(dtype=object)
+        return rows, cls.frame_records(records), errors, unchanged
+    
+    @classmethod
+    def _transformed_chunks(
+        cls,
+        blocks,
+        transform: Callable,
+        columns: list,
+        workers: Optional[int],
+        queue_depth: Optional[int],
+        first_row: int = 0,
+        known_hashes: Optional[Callable] = None
+    ) -> Generator[Tuple[int, int, list, list, int], None, None]:
+        """
+        Yield (source offset, *transform result) for each block, in source order
+        
+        Args:
+            blocks: (block, rows in it, source offset after it) tuples, from
+                _iter_blocks or ParquetSource.frames
+            transform: transform_block or transform_frame, matching the blocks
+        
+        With workers > 1 the blocks go to a process pool; at most queue_depth
+        blocks are read ahead of the writer. known_hashes is only used in-process,
+        since a worker could look ahead of rows the writer hasn't committed yet.
+        """
+        workers = settings.IMPORT_WORKERS if workers is None else workers
+        queue_depth = settings.IMPORT_QUEUE_DEPTH if queue_depth is None else queue_depth
+        
+        if workers <= 1:
+            for block, count, end_offset in blocks:
+                yield (end_offset, *transform(columns, block, first_row, known_hashes))
+                first_row += count
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+            pending = deque()
+            for block, count, end_offset in blocks:
+                pending.append((end_offset, pool.submit(transform, columns, block, first_row)))
+                first_row += count
+                if len(pending) >= max(queue_depth, 1):
+                    end_offset, future = pending.popleft()
+                    yield (end_offset, *future.result())
+            
+            while pending:
+                end_offset, future = pending.popleft()
+                yield (end_offset, *future.result())
+    
+    @classmethod
+    def _upsert_records(cls, db: Session, records: list, table_name: Optional[str] = None) -> Tuple[int, int, int]:
+        """
+        Write new and changed property records with a single INSERT ... ON CONFLICT executemany
+        
+        Records whose source_hash matches the stored fingerprint are skipped,
+        unless they are going to a staging table (table_name), which needs
+        every row; the counts always compare against properties.
+        
+        Returns:
+            (imported, updated, unchanged) counts; a folio repeated within the
+            batch is compared against its previous occurrence
+        """
+        if not records:
+            return 0, 0, 0
+        
+        known = cls._existing_hashes(db, [record['folio_number'] for record in records])
         
         imported = 0
         updated = 0
-        errors = []
+        unchanged = 0
+        changed = []
+        for record in records:
+            folio = record['folio_number']
+            if folio not in known:
+                imported += 1
+            elif known[folio] == record['source_hash']:
+                unchanged += 1
+                continue
+            else:
+                updated += 1
+            known[folio] = record['source_hash']
+            changed.append(record)
         
-        # Read CSV in chunks
-        for chunk_num, chunk in enumerate(pd.read_csv(
-            file_path,
-            chunksize=chunk_size,
-            dtype=str,  # Read all as string initially
-            na_values=['', 'NA', 'N/A', 'null', 'NULL'],
-            keep_default_na=True,
-            encoding='utf-8',
-            encoding_errors='ignore'
-        )):
-            # Normalize column names
-            chunk.columns = [cls.normalize_column_name(c) for c in chunk.columns]
+        rows = records if table_name else changed
+        if rows:
+            # Bind positional tuples straight to the driver, skipping per-row
+            # SQLAlchemy parameter processing
+            sql, fields = cls._upsert_statement(table_name)
+            db.connection().exec_driver_sql(
+                sql,
+                [tuple(record[field] for field in fields) for record in rows]
+            )
+        
+        return imported, updated, unchanged
+    
+    @classmethod
+    def _upsert_statement(cls, table_name: Optional[str] = None) -> Tuple[str, list]:
+        """Compiled INSERT ... ON CONFLICT(folio_number) DO UPDATE for properties (or its staging copy)"""
+        if table_name not in cls._upsert_sql:
+            table = Property.__table__
+            if table_name:
+                table = table.to_metadata(MetaData(), name=table_name)
+            fields = cls.PROPERTY_FIELDS + ['source_hash']
+            stmt = sqlite_insert(table).values({field: bindparam(field) for field in fields})
+            update_columns = {
+                field: stmt.excluded[field]
+                for field in fields
+                if field != 'folio_number'
+            }
+            update_columns['updated_date'] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.folio_number],
+                set_=update_columns
+            )
+            compiled = stmt.compile(dialect=sqlite_dialect.dialect())
+            cls._upsert_sql[table_name] = (str(compiled), list(compiled.positiontup))
+        return cls._upsert_sql[table_name]
+    
+    @classmethod
+    def _staging_exists(cls, db: Session) -> bool:
+        return inspect(db.connection()).has_table(cls.STAGING_TABLE)
+    
+    @classmethod
+    def _create_staging_table(cls, db: Session):
+        """
+        (Re)create the empty staging table for a full refresh
+        
+        It gets the properties columns but only the unique folio index the
+        upsert needs; the other indexes are built once, at the swap.
+        """
+        staging = Property.__table__.to_metadata(MetaData(), name=cls.STAGING_TABLE)
+        connection = db.connection()
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {cls.STAGING_TABLE}")
+        connection.execute(CreateTable(staging))
+        connection.exec_driver_sql(
+            f"CREATE UNIQUE INDEX ix_{cls.STAGING_TABLE}_folio_number "
+            f"ON {cls.STAGING_TABLE} (folio_number)"
+        )
+        db.commit()
+    
+    @classmethod
+    def _swap_staging_table(cls, db: Session) -> dict:
+        """
+        Replace properties with the loaded staging table in one transaction
+        
+        Properties that leads or letter history refer to are carried over if
+        the new data lacks them, and existing rows keep their created_date
+        (and updated_date, when unchanged) and lead copy. Readers see the old table until
+        the commit.
+        
+        Returns:
+            dict with the number of properties removed and carried over
+        """
+        staging = cls.STAGING_TABLE
+        columns = ', '.join(column.name for column in Property.__table__.columns if column.name != 'id')
+        
+        db.commit()
+        connection = db.connection()
+        try:
+            # pysqlite doesn't open a transaction before DDL on its own
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
             
-            # Map columns to database fields
-            column_renames = {}
-            for col in chunk.columns:
-                if col in cls.COLUMN_MAPPING:
-                    column_renames[col] = cls.COLUMN_MAPPING[col]
+            retained = connection.exec_driver_sql(f"""
+                INSERT INTO {staging} ({columns})
+                SELECT {columns} FROM properties
+                WHERE folio_number NOT IN (SELECT folio_number FROM {staging})
+                  AND (folio_number IN (SELECT folio_number FROM leads)
+                       OR folio_number IN (SELECT folio_number FROM letter_history))
+            """).rowcount
             
-            chunk = chunk.rename(columns=column_renames)
+            connection.exec_driver_sql(f"""
+                UPDATE {staging}
+                SET created_date = p.created_date,
+                    lead_id = p.lead_id,
+                    lead_status = p.lead_status,
+                    updated_date = CASE WHEN p.source_hash IS {staging}.source_hash
+                                        THEN p.updated_date ELSE {staging}.updated_date END
+                FROM properties AS p
+                WHERE p.folio_number = {staging}.folio_number
+            """)
             
-            # Check for folio_number column
-            if 'folio_number' not in chunk.columns:
-                raise ValueError("CSV must contain a folio_number (or parcel_id) column")
+            removed = connection.exec_driver_sql(f"""
+                SELECT COUNT(*) FROM properties
+                WHERE folio_number NOT IN (SELECT folio_number FROM {staging})
+            """).scalar()
             
-            # Process each row
-            for idx, row in chunk.iterrows():
-                try:
-                    folio = str(row.get('folio_number', '')).strip()
-                    if not folio or folio == 'nan':
-                        continue
-                    
-                    # Calculate derived fields
-                    stamp_amount = pd.to_numeric(row.get('stamp_amount_1'), errors='coerce')
-                    deed_type = str(row.get('deed_type_1', ''))
-                    est_price, confidence = cls.calculate_doc_stamp_values(stamp_amount, deed_type)
-                    
-                    just_value = pd.to_numeric(row.get('just_value'), errors='coerce')
-                    potential_equity = (just_value - est_price) if est_price and just_value else None
-                    
-                    # Build property data
-                    property_data = {
-                        'folio_number': folio,
-                        'name_line_1': cls._clean_string(row.get('name_line_1')),
-                        'name_line_2': cls._clean_string(row.get('name_line_2')),
-                        'mailing_address_line_1': cls._clean_string(row.get('mailing_address_line_1')),
-                        'mailing_address_line_2': cls._clean_string(row.get('mailing_address_line_2')),
-                        'mailing_city': cls._clean_string(row.get('mailing_city')),
-                        'mailing_state': cls._clean_string(row.get('mailing_state')),
-                        'mailing_zip': cls._clean_string(row.get('mailing_zip')),
-                        'situs_street_number': cls._clean_string(row.get('situs_street_number')),
-                        'situs_street_name': cls._clean_string(row.get('situs_street_name')),
-                        'situs_street_type': cls._clean_string(row.get('situs_street_type')),
-                        'situs_city': cls._clean_string(row.get('situs_city')),
-                        'situs_zip': cls._clean_string(row.get('situs_zip')),
-                        'use_code': cls._clean_string(row.get('use_code')),
-                        'use_type': cls._clean_string(row.get('use_type')),
-                        'bldg_year_built': cls._to_int(row.get('bldg_year_built')),
-                        'bldg_tot_sq_footage': cls._to_int(row.get('bldg_tot_sq_footage')),
-                        'beds': cls._to_int(row.get('beds')),
-                        'baths': cls._to_float(row.get('baths')),
-                        'just_land_value': cls._to_float(row.get('just_land_value')),
-                        'just_building_value': cls._to_float(row.get('just_building_value')),
-                        'just_value': just_value if pd.notna(just_value) else None,
-                        'homestead_flag': cls._to_bool(row.get('homestead_flag')),
-                        'exemption_amount': cls._to_float(row.get('exemption_amount')),
-                        'owners_domicile': cls._clean_string(row.get('owners_domicile')),
-                        'sale_date_1': cls._clean_string(row.get('sale_date_1')),
-                        'deed_type_1': cls._clean_string(row.get('deed_type_1')),
-                        'stamp_amount_1': stamp_amount if pd.notna(stamp_amount) else None,
-                        'estimated_purchase_price': est_price,
-                        'calc_confidence': confidence,
-                        'potential_equity': potential_equity,
-                        'is_absentee_owner': cls.is_absentee_owner(row),
-                    }
-                    
-                    # Upsert: update if exists, insert if not
-                    existing = db.query(Property).filter(Property.folio_number == folio).first()
-                    
-                    if existing:
-                        for key, value in property_data.items():
-                            if key != 'folio_number':
-                                setattr(existing, key, value)
-                        updated += 1
-                    else:
-                        db.add(Property(**property_data))
-                        imported += 1
-                    
-                except Exception as e:
-                    errors.append({
-                        'row': idx,
-                        'folio': row.get('folio_number'),
-                        'error': str(e)
-                    })
+            advised_indexes = IndexAdvisor.advised_index_sql(connection)
+            connection.exec_driver_sql("DROP TABLE properties")
+            connection.exec_driver_sql(f"DROP INDEX ix_{staging}_folio_number")
             
-            # Commit each chunk
-            db.commit()
+            # Keep the folio_number foreign keys in leads and letter_history as
+            # written instead of letting SQLite rewrite references
+            connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+            try:
+                connection.exec_driver_sql(f"ALTER TABLE {staging} RENAME TO properties")
+            finally:
+                connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
             
-            # Report progress
-            processed = (chunk_num + 1) * chunk_size
-            if progress_callback:
-                progress_callback({
-                    'processed': min(processed, total_rows),
-                    'total': total_rows,
-                    'percent': min(100, round((processed / total_rows) * 100)),
-                    'imported': imported,
-                    'updated': updated
-                })
+            for index in Property.__table__.indexes:
+                index.create(connection)
+            for sql in advised_indexes:
+                connection.exec_driver_sql(sql)
+            
+            # The search index's triggers went with the old table
+            if PropertySearch.is_ready(connection):
+                PropertySearch.ensure_index(connection)
+            
+            DataVersionService.bump(connection)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
         
-        return {
-            'total_rows': total_rows,
-            'imported': imported,
-            'updated': updated,
-            'errors': errors[:100],  # Limit error list
-            'error_count': len(errors)
-        }
+        return {'removed': removed, 'retained': retained}
+    
+    @staticmethod
+    def _existing_hashes(db: Session, folios: list, batch_size: int = 500) -> dict:
+        """Map the given folio numbers already in the database to their source_hash"""
+        existing = {}
+        for start in range(0, len(folios), batch_size):
+            batch = folios[start:start + batch_size]
+            rows = db.execute(
+                select(Property.folio_number, Property.source_hash)
+                .where(Property.folio_number.in_(batch))
+            )
+            existing.update((folio, source_hash) for folio, source_hash in rows)
+        return existing
     
     @staticmethod
     def _clean_string(value) -> Optional[str]:
@@ -325,37 +1391,253 @@ class CSVService:
             return False
         return str(value).lower() in ['yes', 'true', '1', 'y']
     
+    @staticmethod
+    def frame_records(frame: pd.DataFrame) -> list:
+        """
+        Rows of a transform_chunk frame as plain dicts
+        
+        The columns already hold native Python values, so this skips the per-cell
+        boxing DataFrame.to_dict('records') does.
+        """
+        fields = list(frame.columns)
+        columns = [frame[field].to_numpy(dtype=object) for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+    
     @classmethod
-    def export_csv(cls, db: Session, filters: dict = None) -> Path:
-        """Export properties to CSV file"""
-        from datetime import datetime
+    def _row_hashes(cls, chunk: pd.DataFrame) -> np.ndarray:
+        """
+        Fingerprint each row of a mapped CSV chunk from its raw source fields
+        
+        Hashing the raw strings lets unchanged rows be dropped before the
+        transform. Derived fields aren't source columns, so changing how they
+        are calculated doesn't mark every row as changed.
+        """
+        fields = [field for field in cls.HASH_FIELDS if field in chunk.columns]
+        if chunk.empty:
+            return np.array([], dtype=object)
+        
+        hashes = pd.util.hash_pandas_object(chunk[fields], index=False).to_numpy()
+        return np.array([f"{value:016x}" for value in hashes.tolist()], dtype=object)
+    
+    @staticmethod
+    def _clean_string_column(values: pd.Series) -> np.ndarray:
+        """Column-wise _clean_string"""
+        stripped = values.str.strip()
+        valid = stripped.notna() & (stripped != '') & ~stripped.isin(CSVService._NAN_SPELLINGS)
+        result = stripped.to_numpy(dtype=object)
+        result[~valid.to_numpy()] = None
+        return result
+    
+    @staticmethod
+    def _parse_number_column(values: pd.Series, strip_chars: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Column-wise float(str(value).replace(...)) for _to_int/_to_float
+        
+        Returns the parsed float64 values (NaN where empty or unparseable) and a
+        mask of non-empty cells that need the per-row path to match exactly.
+        """
+        present = values.notna().to_numpy()
+        text = values.to_numpy(dtype=object, copy=True)
+        parsed = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
         
-        query = db.query(Property)
+        # Only cells that didn't parse as-is can contain separators worth stripping
+        retry = present & np.isnan(parsed)
+        if retry.any():
+            cleaned = values[retry]
+            for char in strip_chars:
+                cleaned = cleaned.str.replace(char, '', regex=False)
+            text[retry] = cleaned.to_numpy(dtype=object)
+            parsed[retry] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype='float64')
         
-        # Apply filters if provided
+        # pd.to_numeric picks which cells parse; float() provides the exact values
+        finite = np.isfinite(parsed)
+        result = np.full(len(values), np.nan)
+        try:
+            result[finite] = text[finite].astype('float64')
+        except (ValueError, TypeError):
+            return result, present
+        
+        return result, present & ~finite
+    
+    @staticmethod
+    def _stored_text(values, missing: str = 'nan') -> pd.Series:
+        """Cleaned string values as the derived-field rules read them, like str() of a missing value"""
+        values = pd.Series(values, dtype=object)
+        return values.where(values.notna(), missing)
+    
+    @staticmethod
+    def _nan_to_none(values: np.ndarray, null_mask: np.ndarray) -> np.ndarray:
+        """Replace masked cells of an object array with None"""
+        values[null_mask] = None
+        return values
+    
+    @classmethod
+    def recompute_derived_fields(
+        cls,
+        db: Session,
+        batch_size: int = 50000,
+        progress_callback: Optional[Callable] = None
+    ) -> dict:
+        """
+        Re-derive the calculated columns of every property from its stored fields
+        
+        Run after changing settings.DOC_STAMP_RATE or ABSENTEE_HOME_STATE instead
+        of re-importing the roll. Properties are read in id ranges, derived
+        with derive_fields and only rows whose values changed are written, one
+        transaction per batch.
+        
+        Returns:
+            dict with total_rows and the updated and unchanged counts
+        """
+        started = time.monotonic()
+        first_id, last_id, total = db.execute(
+            select(func.min(Property.id), func.max(Property.id), func.count(Property.id))
+        ).one()
+        
+        source_columns = [
+            Property.id, Property.stamp_amount_1, Property.just_value, Property.deed_type_1,
+            Property.owners_domicile, Property.situs_street_number, Property.situs_street_name,
+            Property.mailing_address_line_1,
+        ]
+        fields = ['estimated_purchase_price', 'calc_confidence', 'potential_equity', 'is_absentee_owner']
+        update_sql = (
+            f"UPDATE properties SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?"
+        )
+        
+        processed = 0
+        updated = 0
+        for start in range(first_id or 0, (last_id or -1) + 1, batch_size):
+            rows = db.execute(
+                select(*source_columns, *(getattr(Property, field) for field in fields))
+                .where(Property.id >= start, Property.id < start + batch_size)
+            ).all()
+            if not rows:
+                continue
+            
+            batch = pd.DataFrame(rows, columns=[column.key for column in source_columns] + fields)
+            
+            derived = cls.derive_fields(
+                batch['stamp_amount_1'].to_numpy(dtype='float64'),
+                batch['just_value'].to_numpy(dtype='float64'),
+                cls._stored_text(batch['deed_type_1'], missing=''),
+                cls._stored_text(batch['owners_domicile']),
+                cls._stored_text(batch['situs_street_number']) + ' ' + cls._stored_text(batch['situs_street_name']),
+                cls._stored_text(batch['mailing_address_line_1'])
+            )
+            
+            changed = np.zeros(len(batch), dtype=bool)
+            for field in fields:
+                old = batch[field].astype(object)
+                new = pd.Series(derived[field], index=batch.index, dtype=object)
+                changed |= ~((old == new) | (old.isna() & new.isna())).to_numpy()
+            
+            if changed.any():
+                ids = batch['id'].to_numpy()
+                db.connection().exec_driver_sql(update_sql, [
+                    (*(derived[field][i] for field in fields), int(ids[i]))
+                    for i in np.flatnonzero(changed)
+                ])
+                DataVersionService.bump(db)
+            db.commit()
+            
+            processed += len(batch)
+            updated += int(changed.sum())
+            if progress_callback:
+                progress_callback(cls._progress(
+                    processed, processed, total, started,
+                    total_rows=total if processed >= total else None,
+                    imported=0, updated=updated, unchanged=processed - updated,
+                    error_count=0, reject_id=None
+                ))
+        
+        return {
+            'total_rows': processed,
+            'imported': 0,
+            'updated': updated,
+            'unchanged': processed - updated,
+            'errors': [],
+            'error_count': 0,
+            'reject_id': None,
+        }
+    
+    @staticmethod
+    def export_conditions(filters: dict = None) -> list:
+        """WHERE clauses for the export filters (city, use_type, min_value, absentee)"""
+        conditions = []
         if filters:
             if filters.get('city'):
-                query = query.filter(Property.situs_city == filters['city'])
+                conditions.append(Property.situs_city == filters['city'])
             if filters.get('use_type'):
-                query = query.filter(Property.use_type == filters['use_type'])
+                conditions.append(Property.use_type == filters['use_type'])
             if filters.get('min_value'):
-                query = query.filter(Property.just_value >= filters['min_value'])
+                conditions.append(Property.just_value >= filters['min_value'])
             if filters.get('absentee'):
-                query = query.filter(Property.is_absentee_owner == True)
+                conditions.append(Property.is_absentee_owner == True)
+        return conditions
+    
+    @staticmethod
+    def export_columns() -> list:
+        """Exported property columns: the fields of Property.to_dict, in its order"""
+        return [Property.__table__.c[name] for name in Property().to_dict()]
+    
+    @classmethod
+    def iter_export_batches(cls, filters: dict = None, batch_size: int = 5000) -> Generator[list, None, None]:
+        """
+        Yield the export_columns of matching properties in keyset batches (id > last id seen)
         
-        # Convert to DataFrame
-        properties = query.all()
-        data = [p.to_dict() for p in properties]
-        df = pd.DataFrame(data)
+        Each batch checks a connection out of the pool only while it is read,
+        so a slow download doesn't hold one open, and memory stays at one batch
+        whatever the size of the export.
+        """
+        columns = cls.export_columns()
+        conditions = cls.export_conditions(filters)
         
-        # Generate filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"bcpa_export_{timestamp}.csv"
-        filepath = settings.EXPORTS_DIR / filename
+        last_id = None
+        while True:
+            query = select(*columns).where(*conditions).order_by(Property.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(Property.id > last_id)
+            
+            with engine.connect() as connection:
+                rows = connection.execute(query).all()
+            if not rows:
+                return
+            yield rows
+            
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1].id
+    
+    @classmethod
+    def iter_export_csv(cls, filters: dict = None, batch_size: int = 5000) -> Generator[bytes, None, None]:
+        """Export properties to CSV, yielding the header and then one encoded piece per batch"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.name for column in cls.export_columns()])
+        yield buffer.getvalue().encode('utf-8')
         
-        df.to_csv(filepath, index=False)
+        for rows in cls.iter_export_batches(filters, batch_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+    
+    @classmethod
+    def iter_export_columnar(
+        cls,
+        fmt: str,
+        filters: dict = None,
+        compression: Optional[str] = None,
+        batch_size: int = 50000
+    ) -> Generator[bytes, None, None]:
+        """
+        Export properties as a typed Parquet or Arrow IPC file, yielded in pieces
         
-        return filepath
-
+        Each batch becomes a row group (or record batch); see iter_columnar.
+        """
+        return iter_columnar(
+            cls.iter_export_batches(filters, batch_size),
+            cls.export_columns(), fmt, compression
+        )
 
 
@@ -0,0 +1,38 @@
+from sqlalchemy import select, text
+
+from ..models import DataVersion
+from ..models.database import engine
+
+
+class DataVersionService:
+    """
+    Counter bumped by every write that changes property listings or exports
+    
+    Results worked out from the data (cached exports, listing counts) are
+    kept with the version they were made at, and only reused while it is
+    still current.
+    """
+    
+    NAME = 'properties'
+    
+    @classmethod
+    def bump(cls, db) -> None:
+        """
+        Mark the properties data as changed, in the caller's transaction
+        
+        Takes a Session or Connection; the bump commits with the write it
+        belongs to.
+        """
+        db.execute(text(
+            "INSERT INTO data_versions (name, version) VALUES (:name, 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_date = CURRENT_TIMESTAMP"
+        ), {'name': cls.NAME})
+    
+    @classmethod
+    def current(cls, db=None) -> int:
+        """The current version, read with the given Session or Connection (or a new connection)"""
+        query = select(DataVersion.version).where(DataVersion.name == cls.NAME)
+        if db is not None:
+            return db.execute(query).scalar() or 0
+        with engine.connect() as connection:
+            return connection.execute(query).scalar() or 0
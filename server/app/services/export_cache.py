@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Generator, Iterable, Optional
+
+from ..config import settings
+from .columnar import COLUMNAR_FORMATS
+from .data_version_service import DataVersionService
+
+
+class ExportCache:
+    """
+    Finished exports, kept in EXPORTS_DIR under a key for what they contain
+    
+    The key is a hash of the format and the normalized filters, prefixed
+    with the data version (see DataVersionService). Every write that changes
+    what an export returns bumps that version, so an entry is only ever
+    served for the data it was made from; entries from older versions are
+    removed the next time the cache is trimmed.
+    """
+    
+    # How store names entries; trim leaves every other file in EXPORTS_DIR alone
+    SUFFIXES = ['.csv'] + [suffix for suffix, _ in COLUMNAR_FORMATS.values()]
+    ENTRY_NAME = re.compile(r'v(\d+)_[0-9a-f]{32}(?:%s)' % '|'.join(map(re.escape, SUFFIXES)))
+    
+    @staticmethod
+    def key(version: int, fmt: str, filters: dict = None, compression: Optional[str] = None) -> str:
+        """
+        Cache key for an export of the given data version
+        
+        Filters that don't narrow the export (empty, None, False) are
+        dropped, so equivalent requests share an entry.
+        """
+        request = {
+            'format': fmt,
+            'compression': compression,
+            'filters': {name: value for name, value in sorted((filters or {}).items()) if value},
+        }
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"v{version}_{digest[:32]}"
+    
+    @staticmethod
+    def lookup(key: str, suffix: str) -> Optional[Path]:
+        """Path of the cached export, marked as just used, or None"""
+        path = settings.EXPORTS_DIR / f"{key}{suffix}"
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+    
+    @classmethod
+    def store(
+        cls,
+        chunks: Iterable[bytes],
+        key: str,
+        suffix: str,
+        version: int
+    ) -> Generator[bytes, None, None]:
+        """
+        Pass an export through, saving a copy under its key once it is complete
+        
+        The copy is only kept if the whole export was sent and the data
+        version didn't change while it was read; an interrupted download
+        leaves nothing behind.
+        """
+        budget = settings.EXPORT_CACHE_MAX_MB * 1024 * 1024
+        if budget <= 0:
+            yield from chunks
+            return
+        
+        path = settings.EXPORTS_DIR / f"{key}{suffix}"
+        temp_path = settings.EXPORTS_DIR / f".{key}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            if DataVersionService.current() == version:
+                os.replace(temp_path, path)
+                cls.trim(budget, version)
+        finally:
+            temp_path.unlink(missing_ok=True)
+    
+    @classmethod
+    def trim(cls, budget: int, version: int) -> None:
+        """
+        Remove exports of older data versions, then the least recently used
+        until the rest fit in the budget
+        
+        Only files named like cache entries are considered; exports still
+        being written are hidden .part files and don't match.
+        """
+        entries = []
+        for path in settings.EXPORTS_DIR.iterdir():
+            match = cls.ENTRY_NAME.fullmatch(path.name)
+            if match is None or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if int(match.group(1)) != version:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= budget:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,281 @@
+from pathlib import Path
+from typing import Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+import json
+import threading
+import time
+import uuid
+
+from ..models import ImportJob
+from ..models.database import SessionLocal
+from .csv_service import CSVService
+
+
+class ImportCancelled(Exception):
+    """Raised from the progress callback to stop an import between chunks"""
+
+
+class ImportJobService:
+    """Service for running CSV imports (and other bulk writes to properties) as background jobs"""
+    
+    ACTIVE_STATUSES = ('queued', 'running')
+    
+    # Stage shown while a job of each kind runs
+    RUNNING_STAGES = {'import': 'importing', 'recompute': 'recomputing'}
+    
+    # Seconds between progress writes to the import_jobs row
+    PROGRESS_INTERVAL = 1.0
+    
+    # One import at a time: SQLite has a single writer anyway
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-import")
+    _cancel_events = {}
+    
+    @classmethod
+    def submit(
+        cls,
+        db: Session,
+        file_path: Path,
+        source_name: Optional[str] = None,
+        delete_after: bool = False,
+        full_refresh: bool = False
+    ) -> ImportJob:
+        """
+        Queue an import of a CSV file and return its job at once
+        
+        Args:
+            db: Database session
+            file_path: Path to CSV file
+            source_name: Name to show for the job (defaults to the file name)
+            delete_after: Remove the file when the job ends, e.g. a saved upload
+            full_refresh: Replace the table with the file's rows via a staging table swap
+        """
+        file_path = Path(file_path)
+        
+        def run_import(job_db: Session, progress_callback: Callable) -> dict:
+            return CSVService.import_csv(
+                job_db, file_path,
+                progress_callback=progress_callback,
+                full_refresh=full_refresh
+            )
+        
+        def cleanup():
+            if delete_after:
+                file_path.unlink(missing_ok=True)
+        
+        return cls._submit(db, source_name or file_path.name, run_import, cleanup, full_refresh)
+    
+    @classmethod
+    def submit_stream(
+        cls,
+        db: Session,
+        stream,
+        source_name: str,
+        total_bytes: Optional[int] = None,
+        full_refresh: bool = False
+    ) -> ImportJob:
+        """
+        Queue an import that reads CSV data from a stream as it arrives
+        
+        The stream is closed when the job ends, which tells whoever is
+        feeding it to stop.
+        """
+        def run_import(job_db: Session, progress_callback: Callable) -> dict:
+            return CSVService.import_stream(
+                job_db, stream,
+                total_bytes=total_bytes,
+                source_name=source_name,
+                progress_callback=progress_callback,
+                full_refresh=full_refresh
+            )
+        
+        return cls._submit(db, source_name, run_import, stream.close, full_refresh)
+    
+    @classmethod
+    def submit_recompute(cls, db: Session) -> ImportJob:
+        """
+        Queue a recompute of the derived property fields
+        
+        It shares the import queue, so it never writes alongside an import.
+        """
+        def run_recompute(job_db: Session, progress_callback: Callable) -> dict:
+            result = CSVService.recompute_derived_fields(job_db, progress_callback=progress_callback)
+            result['message'] = (
+                f"Recomputed {result['total_rows']} properties: "
+                f"{result['updated']} changed, {result['unchanged']} unchanged"
+            )
+            return result
+        
+        return cls._submit(db, "Recompute derived fields", run_recompute, lambda: None, kind='recompute')
+    
+    @classmethod
+    def is_busy(cls) -> bool:
+        """True while a job is queued or running in this process"""
+        return bool(cls._cancel_events)
+    
+    @classmethod
+    def _submit(
+        cls,
+        db: Session,
+        source_name: str,
+        run_import: Callable,
+        cleanup: Callable,
+        full_refresh: bool = False,
+        kind: str = 'import'
+    ) -> ImportJob:
+        job = ImportJob(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            source_name=source_name,
+            full_refresh=full_refresh,
+            status='queued',
+            stage='queued',
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        cls._cancel_events[job.id] = threading.Event()
+        cls._executor.submit(cls._run, job.id, run_import, cleanup)
+        return job
+    
+    @staticmethod
+    def get_job(db: Session, job_id: str) -> Optional[ImportJob]:
+        return db.query(ImportJob).filter(ImportJob.id == job_id).first()
+    
+    @classmethod
+    def cancel(cls, db: Session, job_id: str) -> Optional[ImportJob]:
+        """
+        Ask a queued or running job to stop
+        
+        A running import stops after the chunk it is writing; its checkpoint
+        is kept, so importing the same file again resumes where it stopped.
+        """
+        job = cls.get_job(db, job_id)
+        if job is None or job.status not in cls.ACTIVE_STATUSES:
+            return job
+        
+        job.cancel_requested = True
+        db.commit()
+        
+        event = cls._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        return job
+    
+    @classmethod
+    def recover_interrupted(cls, db: Session) -> int:
+        """Mark jobs left queued or running by a previous process as failed"""
+        jobs = db.query(ImportJob).filter(
+            ImportJob.status.in_(cls.ACTIVE_STATUSES),
+            ImportJob.id.notin_(list(cls._cancel_events))
+        ).all()
+        
+        for job in jobs:
+            job.status = 'failed'
+            job.stage = 'finished'
+            job.message = "Interrupted by a server restart; import the file again to resume"
+            job.finished_date = func.now()
+        db.commit()
+        return len(jobs)
+    
+    @classmethod
+    def _run(cls, job_id: str, run_import: Callable, cleanup: Callable):
+        """Run one import job on the executor thread"""
+        cancel_event = cls._cancel_events.get(job_id) or threading.Event()
+        db = SessionLocal()
+        try:
+            job = cls.get_job(db, job_id)
+            if job is None:
+                return
+            if cancel_event.is_set():
+                cls._finish(db, job, 'cancelled', "Cancelled before it started")
+                return
+            
+            job.status = 'running'
+            job.stage = cls.RUNNING_STAGES.get(job.kind, 'importing')
+            job.started_date = func.now()
+            db.commit()
+            
+            last_write = 0.0
+            
+            def on_progress(progress: dict):
+                nonlocal last_write
+                if cancel_event.is_set():
+                    raise ImportCancelled()
+                
+                # The final callback (total known) is always written
+                now = time.monotonic()
+                if progress['total'] is None and now - last_write < cls.PROGRESS_INTERVAL:
+                    return
+                last_write = now
+                
+                cls._apply_progress(job, progress)
+                db.commit()
+            
+            try:
+                result = run_import(db, on_progress)
+            except ImportCancelled:
+                db.rollback()
+                if job.kind == 'recompute':
+                    message = f"Cancelled after {job.rows_processed} rows; those keep their recomputed values"
+                else:
+                    message = f"Cancelled after {job.rows_processed} rows; import the same file again to resume"
+                cls._finish(db, job, 'cancelled', message)
+                return
+            except Exception as e:
+                db.rollback()
+                cls._finish(db, job, 'failed', str(e))
+                return
+            
+            job.total_rows = result['total_rows']
+            job.rows_processed = result['total_rows']
+            job.imported = result['imported']
+            job.updated = result['updated']
+            job.unchanged = result['unchanged']
+            job.error_count = result['error_count']
+            job.removed = result.get('removed')
+            job.retained = result.get('retained')
+            job.errors = json.dumps(result['errors'])
+            job.reject_id = result['reject_id']
+            message = result.get('message') or (
+                f"Imported {result['imported']} new, updated {result['updated']} existing, "
+                f"{result['unchanged']} unchanged"
+            )
+            if job.full_refresh:
+                message += f"; removed {result['removed']}, kept {result['retained']} with leads or letters"
+            cls._finish(db, job, 'complete', message)
+        finally:
+            db.close()
+            cls._cancel_events.pop(job_id, None)
+            cleanup()
+    
+    @staticmethod
+    def _apply_progress(job: ImportJob, progress: dict):
+        job.rows_processed = progress['processed']
+        job.total_rows = progress['total']
+        job.bytes_read = progress['bytes_read']
+        job.total_bytes = progress['total_bytes']
+        job.percent = progress['percent']
+        job.rows_per_second = progress['rows_per_second']
+        job.eta_seconds = progress['eta_seconds']
+        job.imported = progress['imported']
+        job.updated = progress['updated']
+        job.unchanged = progress['unchanged']
+        job.error_count = progress['error_count']
+        job.reject_id = progress['reject_id']
+    
+    @staticmethod
+    def _finish(db: Session, job: ImportJob, status: str, message: str):
+        job.status = status
+        job.stage = 'finished'
+        job.message = message
+        job.eta_seconds = None
+        job.finished_date = func.now()
+        if status == 'complete':
+            job.percent = 100
+        db.commit()
+
+
+
@@ -0,0 +1,109 @@
+import io
+import csv
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Optional
+
+from ..config import settings
+
+# Reject files are named after a uuid4().hex, which is all that is accepted back
+REJECT_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+class RejectLog:
+    """
+    Append-only CSV of the rows an import rejected
+    
+    Each chunk's rejects are written out as soon as the chunk is done, so
+    memory use doesn't grow with the error rate. The file is only created
+    once there is something to put in it.
+    """
+    
+    COLUMNS = ['row', 'folio_number', 'reason', 'line']
+    
+    def __init__(self, reject_id: str, size: int = 0):
+        """
+        Args:
+            reject_id: Identifies the file under settings.REJECTS_DIR
+            size: Bytes of the file to keep; anything after them was written
+                for a chunk that was never committed, and is cut off
+        """
+        self.path = self.path_for(reject_id)
+        self.size = size
+        self._file = None
+    
+    def write(self, errors: list) -> int:
+        """Append row errors (dicts of row, folio, error and line); returns the file size"""
+        if not errors:
+            return self.size
+        
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._file.truncate(self.size)
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self.size == 0:
+            writer.writerow(self.COLUMNS)
+        writer.writerows(
+            (error['row'], error.get('folio'), error['error'], error.get('line'))
+            for error in errors
+        )
+        self._file.write(buffer.getvalue().encode('utf-8'))
+        self._file.flush()
+        self.size = self._file.tell()
+        return self.size
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @staticmethod
+    def path_for(reject_id: str) -> Path:
+        if not REJECT_ID_PATTERN.fullmatch(reject_id or ''):
+            raise ValueError(f"Invalid reject id: {reject_id!r}")
+        return settings.REJECTS_DIR / f"{reject_id}.csv"
+    
+    @classmethod
+    def existing_path(cls, reject_id: Optional[str]) -> Optional[Path]:
+        """Path of the reject file, or None if the import rejected nothing"""
+        if not reject_id:
+            return None
+        path = cls.path_for(reject_id)
+        return path if path.exists() else None
+    
+    @classmethod
+    def read_page(cls, reject_id: Optional[str], offset: int = 0, limit: int = 100) -> dict:
+        """
+        Read one page of rejects, streaming past the earlier ones
+        
+        Returns:
+            dict with the rejects (row, folio_number, reason, line) and whether
+            more follow
+        """
+        path = cls.existing_path(reject_id)
+        if path is None:
+            return {'offset': offset, 'limit': limit, 'rejects': [], 'has_more': False}
+        
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            reader = csv.DictReader(f)
+            page = list(islice(reader, offset, offset + limit + 1))
+        
+        rejects = [
+            {**reject, 'row': int(reject['row'])}
+            for reject in page[:limit]
+        ]
+        return {
+            'offset': offset,
+            'limit': limit,
+            'rejects': rejects,
+            'has_more': len(page) > limit,
+        }
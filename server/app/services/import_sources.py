@@ -0,0 +1,367 @@
+import io
+import gzip
+import time
+import zlib
+import queue
+import struct
+import hashlib
+import zipfile
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from typing import Optional, Callable, Tuple
+
+# Leading bytes of the compressed formats accepted for import
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+SOURCE_SUFFIXES = ('.csv', '.gz', '.zip', '.zst', '.parquet')
+
+
+def is_supported_source(name: str) -> bool:
+    """True for file names the importer accepts (.csv, .csv.gz, .zip, .csv.zst, .parquet)"""
+    return name.lower().endswith(SOURCE_SUFFIXES)
+
+
+def open_source(stream) -> Tuple[object, Optional[Callable[[], int]]]:
+    """
+    Wrap a binary stream so it reads as plain CSV, decompressing as it goes
+    
+    The format is detected from the leading bytes rather than the name.
+    Returns the CSV stream and, for compressed input, a function giving the
+    compressed bytes consumed so far (progress is measured against the
+    source size, not the inflated size).
+    """
+    peek = getattr(stream, 'peek', None)
+    magic = peek(4)[:4] if peek else b''
+    
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=stream, mode='rb'), stream.tell
+    
+    if magic.startswith(ZIP_MAGIC):
+        if stream.seekable():
+            return _open_zip_member(stream), stream.tell
+        return io.BufferedReader(ZipStreamReader(stream), buffer_size=1 << 16), stream.tell
+    
+    if magic.startswith(ZSTD_MAGIC):
+        reader = _zstandard().ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+        return io.BufferedReader(reader, buffer_size=1 << 16), stream.tell
+    
+    return stream, None
+
+
+def decompress_prefix(data: bytes) -> bytes:
+    """
+    Decompress as much of the start of a source as the given bytes allow
+    
+    Used to check the CSV header of a compressed upload before the rest of
+    it has arrived.
+    """
+    try:
+        if data.startswith(GZIP_MAGIC):
+            return zlib.decompressobj(wbits=31).decompress(data)
+        
+        if data.startswith(ZIP_MAGIC):
+            # Skip leading directory entries, as ZipStreamReader does
+            start = 0
+            while len(data) >= start + 30:
+                flags, method, size, name_length, extra_length = _zip_local_header(data[start:start + 30])
+                name = data[start + 30:start + 30 + name_length]
+                start += 30 + name_length + extra_length
+                if not name.endswith(b'/'):
+                    member = data[start:]
+                    if method == 8:
+                        return zlib.decompressobj(-15).decompress(member)
+                    return member
+                start += size
+            return b''
+    except zlib.error as e:
+        raise ValueError(f"Compressed file is corrupt: {e}")
+    
+    if data.startswith(ZSTD_MAGIC):
+        return _zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    
+    return data
+
+
+def _open_zip_member(stream):
+    """Open the single CSV inside a seekable ZIP archive"""
+    archive = zipfile.ZipFile(stream)
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+    ]
+    csv_members = [info for info in members if info.filename.lower().endswith('.csv')] or members
+    if len(csv_members) != 1:
+        raise ValueError("ZIP archive must contain exactly one CSV file")
+    return archive.open(csv_members[0])
+
+
+def _zip_local_header(header: bytes) -> Tuple[int, int, int, int, int]:
+    """Unpack (flags, method, compressed size, name length, extra length) from a ZIP local header"""
+    if len(header) < 30 or not header.startswith(ZIP_MAGIC):
+        raise ValueError("Not a ZIP archive, or its first entry is not followed by a file")
+    flags, method = struct.unpack('<HH', header[6:10])
+    compressed_size = struct.unpack('<I', header[18:22])[0]
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    return flags, method, compressed_size, name_length, extra_length
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Importing .zst files requires the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+class QueueReader(io.RawIOBase):
+    """
+    Binary file-like object fed with chunks from another thread
+    
+    The producer calls feed() for each chunk and finish() at the end; the
+    consumer reads it like a file (wrap it in io.BufferedReader for
+    readline and line iteration). The queue is bounded, so a slow consumer
+    holds the producer back instead of buffering the whole source.
+    """
+    
+    def __init__(self, max_chunks: int = 16):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._pending = memoryview(b'')
+        self._eof = False
+        self._consumed = 0
+        self._stopped = threading.Event()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self._pending and not self._eof:
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            else:
+                self._pending = memoryview(item)
+        
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        self._consumed += n
+        return n
+    
+    def tell(self) -> int:
+        """Bytes handed to the reader so far"""
+        return self._consumed
+    
+    def feed(self, data: bytes) -> bool:
+        """
+        Queue a chunk for the reader, blocking while the queue is full
+        
+        Returns False once the reader has been closed, so the producer can
+        stop sending.
+        """
+        if not data:
+            return not self._stopped.is_set()
+        return self._put(data)
+    
+    def finish(self):
+        """Mark the end of the data"""
+        self._put(None)
+    
+    def fail(self, error: BaseException):
+        """End the data with an error, raised in the reading thread"""
+        self._put(error)
+    
+    def close(self):
+        self._stopped.set()
+        super().close()
+    
+    def _put(self, item) -> bool:
+        # Poll so a producer blocked on a full queue notices the reader closing
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+class SourceChangedError(ValueError):
+    """The remote object changed while it was being read"""
+
+
+class HTTPRangeReader(io.RawIOBase):
+    """
+    Seekable, read-only file over an HTTP(S) URL
+    
+    The body is read as it downloads. When the connection drops, or on
+    seek(), it reconnects with a Range request from the current position,
+    so a large download never starts over. If-Range makes the server send
+    the whole object if it changed since the first request; that raises
+    SourceChangedError, since the new bytes can't be spliced onto the old.
+    """
+    
+    def __init__(self, url: str, retries: int = 5, timeout: float = 60.0, backoff: float = 1.0):
+        super().__init__()
+        self.url = url
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.etag = None
+        self.last_modified = None
+        self._pos = 0
+        
+        self._response = self._open(0)
+        headers = self._response.headers
+        length = headers.get('Content-Length')
+        self.size = int(length) if length else None
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        self.accepts_ranges = headers.get('Accept-Ranges', '').lower() == 'bytes'
+    
+    @property
+    def source_key(self) -> Optional[str]:
+        """Checkpoint identity; None unless the server gives a validator to detect changes"""
+        if not (self.etag or self.last_modified):
+            return None
+        identity = f"{self.url}\n{self.size}\n{self.etag}\n{self.last_modified}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return self.accepts_ranges
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            if self.size is None:
+                raise io.UnsupportedOperation("Size of the remote file is unknown")
+            offset += self.size
+        
+        if offset != self._pos:
+            if not self.accepts_ranges:
+                raise io.UnsupportedOperation(f"{self.url} does not support range requests")
+            self._close_response()
+            self._pos = offset
+        return self._pos
+    
+    def readinto(self, buffer) -> int:
+        if self.size is not None and self._pos >= self.size:
+            return 0
+        
+        attempt = 0
+        while True:
+            try:
+                if self._response is None:
+                    self._response = self._open(self._pos)
+                n = self._response.readinto(buffer)
+                if n == 0 and self.size is not None and self._pos < self.size:
+                    raise http.client.IncompleteRead(b'', self.size - self._pos)
+                self._pos += n
+                return n
+            except (http.client.HTTPException, OSError) as e:
+                self._close_response()
+                attempt += 1
+                client_error = isinstance(e, urllib.error.HTTPError) and e.code < 500
+                if client_error or not self.accepts_ranges or attempt > self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+    
+    def close(self):
+        self._close_response()
+        super().close()
+    
+    def _open(self, position: int):
+        request = urllib.request.Request(self.url)
+        if position:
+            request.add_header('Range', f'bytes={position}-')
+            validator = self.etag or self.last_modified
+            if validator:
+                request.add_header('If-Range', validator)
+        
+        response = urllib.request.urlopen(request, timeout=self.timeout)
+        if position and response.status != 206:
+            validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            response.close()
+            if (self.etag or self.last_modified) and validators != (self.etag, self.last_modified):
+                raise SourceChangedError(f"{self.url} changed during the download")
+            raise ValueError(f"{self.url} ignored the range request")
+        return response
+    
+    def _close_response(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+class ZipStreamReader(io.RawIOBase):
+    """
+    Read the first member of a ZIP archive from a non-seekable stream
+    
+    zipfile needs the central directory at the end of the archive; this
+    parses the local headers at the front instead, so the first file can be
+    inflated while the archive is still arriving. Only deflated members,
+    and stored members with their size in the header, are supported.
+    """
+    
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self._pending = memoryview(b'')
+        
+        # Directory entries (which zip tools put before their files) have no data
+        while True:
+            flags, method, compressed_size, name_length, extra_length = _zip_local_header(stream.read(30))
+            self.name = stream.read(name_length).decode('utf-8', 'replace')
+            stream.read(extra_length)
+            if not self.name.endswith('/'):
+                break
+            stream.read(compressed_size)
+        
+        self._inflater = None
+        self._remaining = None
+        if method == 8:
+            self._inflater = zlib.decompressobj(-15)
+        elif method == 0 and not flags & 0x08 and compressed_size != 0xFFFFFFFF:
+            self._remaining = compressed_size
+        else:
+            raise ValueError("Unsupported ZIP compression; re-zip the CSV with deflate")
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._inflater is not None:
+                if self._inflater.eof:
+                    return 0
+                data = self._stream.read(1 << 16)
+                if not data:
+                    raise EOFError("ZIP archive is truncated")
+                self._pending = memoryview(self._inflater.decompress(data))
+            else:
+                if not self._remaining:
+                    return 0
+                data = self._stream.read(min(1 << 16, self._remaining))
+                if not data:
+                    raise EOFError("ZIP archive is truncated")
+                self._remaining -= len(data)
+                self._pending = memoryview(data)
+        
+        n = min(len(buffer), len(self._pending))
+        buffer[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+
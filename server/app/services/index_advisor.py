@@ -0,0 +1,318 @@
+import re
+import threading
+from typing import Optional
+
+from sqlalchemy import asc, desc, func, select, text
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ..models import Property, QueryUsage
+from ..models.database import engine
+from .property_search import PropertySearch
+
+
+class IndexAdvisor:
+    """
+    Suggests property indexes from the listing filters and sorts in use
+    
+    Every property listing records its shape: the filters given and the
+    sort. The report runs EXPLAIN QUERY PLAN on the most used shapes and,
+    where SQLite would sort in a temp B-tree or scan the table to filter,
+    proposes an index on the equality-filtered columns, then the sort
+    column, then the range-filtered ones. The listing can then read rows
+    in index order, and its count reads the index alone.
+    
+    The indexes hold those columns only, not the ones a listing returns:
+    a listing returns every property column, and an index holding all of
+    them would be another copy of the table to write on every import. So
+    counts are index-only, while listings seek in the index and read each
+    row of the page from the table.
+    
+    apply() creates the proposed indexes for the hot shapes and drops the
+    ones it made earlier that no hot shape needs any more. Indexes declared
+    on the model are never touched.
+    """
+    
+    PREFIX = 'idx_advised_'
+    
+    # What the advised indexes do and don't cover, shown with the report
+    NOTE = (
+        "Advised indexes hold the filter and sort columns only: counts read the index alone "
+        "(count_index_only), listings read rows in index order and fetch each row of the page "
+        "from the table, since they return every property column"
+    )
+    
+    # Listing filter -> (column, how it filters). search, city and zip match
+    # substrings (or use the search index), which a B-tree index can't serve
+    FILTER_COLUMNS = {
+        'use_type': ('use_type', 'eq'),
+        'lead_status': ('lead_status', 'eq'),
+        'absentee': ('is_absentee_owner', 'eq'),
+        'homestead': ('homestead_flag', 'eq'),
+        'min_value': ('just_value', 'min'),
+        'max_value': ('just_value', 'max'),
+        'min_equity': ('potential_equity', 'min'),
+        'min_year': ('bldg_year_built', 'min'),
+        'max_year': ('bldg_year_built', 'max'),
+    }
+    SUBSTRING_FILTERS = {'city': 'situs_city', 'zip': 'situs_zip'}
+    
+    # Hits are written out in batches by a background thread, never by the
+    # listing itself: every FLUSH_SECONDS, or sooner once FLUSH_EVERY are pending
+    FLUSH_EVERY = 100
+    FLUSH_SECONDS = 60
+    
+    _pending = {}
+    _pending_hits = 0
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _flusher = None
+    
+    @staticmethod
+    def shape(filters: dict) -> str:
+        """The names of the filters that were given, sorted and comma-separated"""
+        return ','.join(sorted(name for name, value in filters.items() if value not in (None, '', 'all')))
+    
+    @classmethod
+    def record(cls, filters: dict, sort: str, order: str) -> None:
+        """Count one listing with these filters (name -> value given) and sort"""
+        key = (cls.shape(filters), sort, order)
+        with cls._lock:
+            cls._pending[key] = cls._pending.get(key, 0) + 1
+            cls._pending_hits += 1
+            if cls._flusher is None:
+                cls._flusher = threading.Thread(target=cls._flush_loop, name='index-advisor-flush', daemon=True)
+                cls._flusher.start()
+            if cls._pending_hits >= cls.FLUSH_EVERY:
+                cls._wake.set()
+    
+    @classmethod
+    def _flush_loop(cls) -> None:
+        """Flush the recorded hits in the background for the life of the process"""
+        while True:
+            cls._wake.wait(cls.FLUSH_SECONDS)
+            cls._wake.clear()
+            try:
+                cls.flush()
+            except Exception as e:
+                print(f"[!] Index advisor flush failed: {e}", flush=True)
+    
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Add the recorded hits to query_usage
+        
+        Called by the background thread, before a report and at shutdown.
+        """
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+            cls._pending_hits = 0
+        if not pending:
+            return
+        
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(
+                    "INSERT INTO query_usage (filters, sort, direction, hits, last_used) "
+                    "VALUES (:filters, :sort, :direction, :hits, CURRENT_TIMESTAMP) "
+                    "ON CONFLICT (filters, sort, direction) DO UPDATE SET "
+                    "hits = hits + excluded.hits, last_used = CURRENT_TIMESTAMP"
+                ), [
+                    {'filters': filters, 'sort': sort, 'direction': direction, 'hits': hits}
+                    for (filters, sort, direction), hits in pending.items()
+                ])
+        except OperationalError:
+            # The database is busy (e.g. an import); keep the hits for next time
+            with cls._lock:
+                for key, hits in pending.items():
+                    cls._pending[key] = cls._pending.get(key, 0) + hits
+                    cls._pending_hits += hits
+    
+    @classmethod
+    def index_columns(cls, filters: str, sort: str) -> list:
+        """Columns of the index proposed for a shape: equality filters, sort, ranges"""
+        given = [cls.FILTER_COLUMNS[name] for name in filters.split(',') if name in cls.FILTER_COLUMNS]
+        columns = sorted({column for column, how in given if how == 'eq'})
+        if sort in Property.__table__.c and sort != 'id' and sort not in columns:
+            columns.append(sort)
+        for column in sorted({column for column, how in given if how != 'eq'}):
+            if column not in columns:
+                columns.append(column)
+        return columns
+    
+    @classmethod
+    def _conditions(cls, filters: str) -> list:
+        """Stand-in WHERE clauses for a shape's filters, like list_properties applies them"""
+        conditions = []
+        for name in filter(None, filters.split(',')):
+            if name in cls.FILTER_COLUMNS:
+                column, how = cls.FILTER_COLUMNS[name]
+                column = Property.__table__.c[column]
+                if how == 'eq':
+                    conditions.append(column == 'x')
+                elif how == 'min':
+                    conditions.append(column >= 0)
+                else:
+                    conditions.append(column <= 0)
+            elif name in cls.SUBSTRING_FILTERS:
+                conditions.append(Property.__table__.c[cls.SUBSTRING_FILTERS[name]].ilike('%x%'))
+            elif name == 'search':
+                conditions.append(Property.id.in_(PropertySearch.matching_ids('"x"*')))
+        return conditions
+    
+    @staticmethod
+    def _plan(connection, statement) -> list:
+        """EXPLAIN QUERY PLAN details of a statement"""
+        compiled = statement.compile(dialect=sqlite_dialect.dialect())
+        parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+        return [
+            row[-1] for row in
+            connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), parameters)
+        ]
+    
+    @staticmethod
+    def _index_names(plan: list) -> list:
+        """Indexes a query plan reads"""
+        return sorted({
+            name for detail in plan
+            for name in re.findall(r'USING (?:COVERING )?INDEX (\w+)', detail)
+        })
+    
+    @staticmethod
+    def _index_only(plan: list) -> bool:
+        """Whether a query plan reads properties from covering indexes alone"""
+        reads = [detail for detail in plan if re.match(r'(SCAN|SEARCH) properties\b', detail)]
+        return bool(reads) and all('COVERING INDEX' in detail for detail in reads)
+    
+    @staticmethod
+    def _existing_indexes(connection) -> dict:
+        """Plain-column indexes on properties: name -> column names"""
+        indexes = {}
+        for row in connection.exec_driver_sql("PRAGMA index_list(properties)"):
+            columns = tuple(
+                info[2] for info in connection.exec_driver_sql(f"PRAGMA index_info({row[1]})")
+            )
+            if None not in columns:
+                indexes[row[1]] = columns
+        return indexes
+    
+    @classmethod
+    def report(cls, db: Session, limit: Optional[int] = 50) -> dict:
+        """
+        Explain the most used listing shapes and propose indexes for the slow ones
+        
+        Returns:
+            dict with shapes (most used first: filters, sort, order, hits,
+            plan, count_plan, the indexes_used by each, whether each is
+            index_only, needs_index and suggested_index), the advised
+            indexes that exist and a note on what they cover
+        """
+        cls.flush()
+        connection = db.connection()
+        existing = cls._existing_indexes(connection)
+        
+        usage = db.query(QueryUsage).order_by(QueryUsage.hits.desc(), QueryUsage.id)
+        if limit:
+            usage = usage.limit(limit)
+        
+        shapes = []
+        for row in usage.all():
+            conditions = cls._conditions(row.filters)
+            listing = select(Property).where(*conditions)
+            sort_column = Property.__table__.c.get(row.sort)
+            if sort_column is not None:
+                direction = desc if row.direction == 'desc' else asc
+                listing = listing.order_by(direction(sort_column), direction(Property.id))
+            plan = cls._plan(connection, listing.limit(100))
+            count_plan = cls._plan(connection, select(func.count()).select_from(Property).where(*conditions))
+            
+            # Searches read their matches from the search index, whatever the sort
+            names = row.filters.split(',')
+            filtered = any(name in cls.FILTER_COLUMNS for name in names)
+            needs_index = 'search' not in names and (
+                any('TEMP B-TREE' in detail for detail in plan)
+                or (filtered and any(re.match(r'SCAN properties\b', detail) for detail in plan + count_plan))
+            )
+            
+            columns = cls.index_columns(row.filters, row.sort)
+            suggested = None
+            if columns:
+                name = next(
+                    (name for name, indexed in existing.items() if list(indexed) == columns),
+                    cls.PREFIX + '__'.join(columns)
+                )
+                suggested = {'name': name, 'columns': columns, 'exists': name in existing}
+            
+            shapes.append({
+                **row.to_dict(),
+                'plan': plan,
+                'count_plan': count_plan,
+                'indexes_used': cls._index_names(plan),
+                'count_indexes_used': cls._index_names(count_plan),
+                'index_only': cls._index_only(plan),
+                'count_index_only': cls._index_only(count_plan),
+                'needs_index': needs_index,
+                'suggested_index': suggested,
+            })
+        
+        return {
+            'shapes': shapes,
+            'advised_indexes': sorted(name for name in existing if name.startswith(cls.PREFIX)),
+            'note': cls.NOTE,
+        }
+    
+    @classmethod
+    def apply(cls, db: Session, min_hits: int = 10, max_indexes: int = 10, dry_run: bool = False) -> dict:
+        """
+        Create the indexes proposed for shapes used at least min_hits times
+        and drop advised indexes that none of them needs
+        
+        The most used shapes come first; at most max_indexes advised indexes
+        are kept, since each one slows down imports.
+        
+        Returns:
+            dict with the created, dropped and kept index names
+        """
+        report = cls.report(db, limit=None)
+        wanted = []
+        for shape in report['shapes']:
+            if shape['hits'] < min_hits:
+                break
+            names = [name for name in shape['indexes_used'] if name.startswith(cls.PREFIX)]
+            suggested = shape['suggested_index']
+            if suggested and suggested['name'].startswith(cls.PREFIX) and (shape['needs_index'] or suggested['exists']):
+                names.append(suggested['name'])
+            for name in names:
+                if name not in wanted and len(wanted) < max_indexes:
+                    wanted.append(name)
+        
+        existing = set(report['advised_indexes'])
+        created = [name for name in wanted if name not in existing]
+        dropped = sorted(existing - set(wanted))
+        
+        if not dry_run:
+            connection = db.connection()
+            for name in created:
+                columns = name[len(cls.PREFIX):].split('__')
+                connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON properties ({', '.join(columns)})")
+            for name in dropped:
+                connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+            db.commit()
+        
+        return {
+            'created': created,
+            'dropped': dropped,
+            'kept': [name for name in wanted if name in existing],
+            'dry_run': dry_run,
+        }
+    
+    @classmethod
+    def advised_index_sql(cls, connection) -> list:
+        """CREATE INDEX statements of the advised indexes, to rebuild them on a new table"""
+        return [
+            sql for (sql,) in connection.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'properties' "
+                f"AND substr(name, 1, {len(cls.PREFIX)}) = '{cls.PREFIX}'"
+            )
+        ]
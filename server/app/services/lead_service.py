@@ -0,0 +1,57 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+class LeadService:
+    """
+    Keeps each property's lead_id and lead_status in step with its lead
+    
+    The property listing reads (and filters on) these copies, so it needs no
+    join with leads. Every write to a lead updates its property in the same
+    transaction; sync_properties repairs any that differ, e.g. after an
+    upgrade adds the columns.
+    """
+    
+    # The property's current lead is its newest one
+    _SET_LEAD = """
+        UPDATE properties
+        SET (lead_id, lead_status) = (
+            SELECT leads.id, leads.lead_status FROM leads
+            WHERE leads.folio_number = properties.folio_number
+            ORDER BY leads.id DESC LIMIT 1
+        )
+    """
+    
+    @classmethod
+    def sync_property(cls, db: Session, folio_number: str) -> None:
+        """
+        Copy a property's lead onto it, in the caller's transaction
+        
+        Call after adding, changing or deleting the property's lead; pending
+        changes are flushed first so the copy sees them.
+        """
+        db.flush()
+        db.execute(
+            text(cls._SET_LEAD + " WHERE folio_number = :folio_number"),
+            {'folio_number': folio_number}
+        )
+    
+    @classmethod
+    def sync_properties(cls, db) -> int:
+        """
+        Fix every property whose lead copy differs from its lead
+        
+        Takes a Session or Connection. Only properties with a lead, or a
+        stale copy of one, are looked at.
+        
+        Returns:
+            Number of properties updated
+        """
+        return db.execute(text(cls._SET_LEAD + """
+            WHERE (folio_number IN (SELECT folio_number FROM leads) OR lead_id IS NOT NULL)
+              AND (lead_id, lead_status) IS NOT (
+                  SELECT leads.id, leads.lead_status FROM leads
+                  WHERE leads.folio_number = properties.folio_number
+                  ORDER BY leads.id DESC LIMIT 1
+              )
+        """)).rowcount
@@ -0,0 +1,142 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, literal_column, select, table
+from sqlalchemy.exc import OperationalError
+
+
+class PropertySearch:
+    """
+    Full-text index of the searchable property fields (SQLite FTS5)
+    
+    properties_fts indexes the words of each field, with prefix indexes, and
+    is kept in step with properties by triggers. A search matches properties
+    with a word starting with each search word, in any of the fields, which
+    is close to the substring match it replaces for owner names, folios and
+    addresses, without reading every row.
+    """
+    
+    TABLE = 'properties_fts'
+    
+    # Owner, folio, situs address, mailing address and property type
+    FIELDS = [
+        'name_line_1', 'name_line_2',
+        'folio_number',
+        'situs_street_number', 'situs_street_name', 'situs_street_type', 'situs_city', 'situs_zip',
+        'mailing_address_line_1', 'mailing_address_line_2', 'mailing_city', 'mailing_state', 'mailing_zip',
+        'use_type', 'use_code',
+    ]
+    
+    # Keep the index in step with properties row by row
+    TRIGGERS = [f'{TABLE}_insert', f'{TABLE}_delete', f'{TABLE}_update']
+    
+    # For queries: rowid is the property id, rank its bm25 relevance (lower is better)
+    fts = table(TABLE, column('rowid'), column('rank'))
+    
+    _ready = False
+    
+    @classmethod
+    def ensure_index(cls, connection) -> bool:
+        """
+        Create the index and its triggers where missing, filling it if needed
+        
+        Run at startup, after the properties table has been replaced and
+        after a bulk load (see suspend). Returns False if this SQLite build lacks FTS5; searches then fall
+        back to substring matching.
+        """
+        existing = {
+            name for (name,) in connection.exec_driver_sql(
+                f"SELECT name FROM sqlite_master WHERE name LIKE '{cls.TABLE}%'"
+            )
+        }
+        fields = ', '.join(cls.FIELDS)
+        old_fields = ', '.join(f"old.{field}" for field in cls.FIELDS)
+        new_fields = ', '.join(f"new.{field}" for field in cls.FIELDS)
+        
+        rebuild = False
+        if cls.TABLE not in existing:
+            try:
+                connection.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE {cls.TABLE} USING fts5({fields}, "
+                    f"content='properties', content_rowid='id', prefix='2 3')"
+                )
+            except OperationalError:
+                return False
+            rebuild = True
+        
+        # Only changes to the indexed fields touch the index
+        insert_trigger, delete_trigger, update_trigger = cls.TRIGGERS
+        triggers = {
+            insert_trigger: f"""
+                AFTER INSERT ON properties BEGIN
+                    INSERT INTO {cls.TABLE} (rowid, {fields}) VALUES (new.id, {new_fields});
+                END""",
+            delete_trigger: f"""
+                AFTER DELETE ON properties BEGIN
+                    INSERT INTO {cls.TABLE} ({cls.TABLE}, rowid, {fields}) VALUES ('delete', old.id, {old_fields});
+                END""",
+            update_trigger: f"""
+                AFTER UPDATE OF {fields} ON properties BEGIN
+                    INSERT INTO {cls.TABLE} ({cls.TABLE}, rowid, {fields}) VALUES ('delete', old.id, {old_fields});
+                    INSERT INTO {cls.TABLE} (rowid, {fields}) VALUES (new.id, {new_fields});
+                END""",
+        }
+        for name, body in triggers.items():
+            if name not in existing:
+                connection.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+                rebuild = True
+        
+        # A missing trigger means writes may have been missed
+        if rebuild:
+            connection.exec_driver_sql(f"INSERT INTO {cls.TABLE} ({cls.TABLE}) VALUES ('rebuild')")
+        cls._ready = True
+        return True
+    
+    @classmethod
+    def suspend(cls, connection) -> bool:
+        """
+        Drop the triggers ahead of a bulk load; ensure_index restores them
+        
+        Indexing every inserted row nearly doubles a first import, while
+        rebuilding the index once afterwards takes seconds. If the load
+        never finishes, the next startup's ensure_index finds the triggers
+        missing and rebuilds. Returns False if there is no index.
+        """
+        if not cls.is_ready(connection):
+            return False
+        for name in cls.TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        return True
+    
+    @classmethod
+    def is_ready(cls, db) -> bool:
+        """True once the index exists"""
+        if not cls._ready:
+            cls._ready = db.execute(
+                select(literal_column('1')).select_from(table('sqlite_master', column('name')))
+                .where(column('name') == cls.TABLE)
+            ).first() is not None
+        return cls._ready
+    
+    @staticmethod
+    def match_query(search: str) -> Optional[str]:
+        """
+        FTS5 query for properties with a word starting with each search word
+        
+        Returns None when the search has no words to look up (e.g. only
+        punctuation).
+        """
+        words = re.findall(r'\w+', search)
+        if not words:
+            return None
+        return ' '.join(f'"{word}"*' for word in words)
+    
+    @classmethod
+    def matches(cls, match: str):
+        """WHERE clause selecting the index rows that match an FTS5 query"""
+        return literal_column(cls.TABLE).op('MATCH')(match)
+    
+    @classmethod
+    def matching_ids(cls, match: str):
+        """Subquery of the ids of the properties that match an FTS5 query"""
+        return select(cls.fts.c.rowid).where(cls.matches(match))
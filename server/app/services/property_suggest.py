@@ -0,0 +1,148 @@
+import re
+from itertools import chain, zip_longest
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import Property
+
+
+class PropertySuggest:
+    """
+    Autocomplete for the property search box: folios, owners and addresses
+    starting with what has been typed
+    
+    Each kind of suggestion is a range read on an index over the normalized
+    (upper-case) value, in index order, so it stops after the first few
+    matches however many there are. The indexes belong to the properties
+    table, so imports and full-refresh swaps keep them current.
+    """
+    
+    # Compared in upper case, as the idx_suggest_* indexes store them
+    owner_key = func.upper(Property.name_line_1)
+    street_key = func.upper(Property.situs_street_name)
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Upper case with single spaces, as the suggestions are compared"""
+        return ' '.join(text.upper().split())
+    
+    @staticmethod
+    def _prefix_range(column, prefix: str):
+        """Condition for values starting with prefix that an index on column can seek to"""
+        return column.between(prefix, prefix + '\U0010ffff')
+    
+    @classmethod
+    def suggest(cls, db: Session, text: str, limit: int = 10) -> list:
+        """
+        Up to limit suggestions for a partly typed search
+        
+        Input starting with a digit is looked up as a folio number (dashes
+        and spaces ignored) and as a street number, optionally followed by
+        the start of the street name. Other input is looked up as the start
+        of an owner name or street name; those suggestions are grouped,
+        with the number of properties each one covers.
+        
+        Returns:
+            list of dicts with type (folio, address, owner or street), value
+            (text to search for), label, folio_number (when the suggestion
+            is a single property) and properties
+        """
+        text = cls.normalize(text)
+        if not text:
+            return []
+        
+        if text[0].isdigit():
+            groups = [
+                cls._folios(db, re.sub(r'[\s-]', '', text), limit),
+                cls._addresses(db, text, limit),
+            ]
+        else:
+            groups = [
+                cls._owners(db, text, limit),
+                cls._streets(db, text, limit),
+            ]
+        
+        # Alternate between the kinds, so each gets a share of the list
+        merged = [suggestion for suggestion in chain(*zip_longest(*groups)) if suggestion]
+        return merged[:limit]
+    
+    @classmethod
+    def _folios(cls, db: Session, prefix: str, limit: int) -> list:
+        rows = db.query(Property.folio_number, Property.name_line_1).filter(
+            cls._prefix_range(Property.folio_number, prefix)
+        ).order_by(Property.folio_number).limit(limit).all()
+        return [
+            {
+                'type': 'folio',
+                'value': folio,
+                'label': f"{folio} - {owner}" if owner else folio,
+                'folio_number': folio,
+                'properties': 1,
+            }
+            for folio, owner in rows
+        ]
+    
+    @classmethod
+    def _addresses(cls, db: Session, text: str, limit: int) -> list:
+        number, _, street = text.partition(' ')
+        query = db.query(
+            Property.folio_number, Property.situs_street_number, Property.situs_street_name,
+            Property.situs_street_type, Property.situs_city
+        )
+        if street:
+            query = query.filter(
+                Property.situs_street_number == number,
+                cls._prefix_range(cls.street_key, street)
+            )
+        else:
+            query = query.filter(cls._prefix_range(Property.situs_street_number, number))
+        rows = query.order_by(Property.situs_street_number, cls.street_key).limit(limit).all()
+        
+        suggestions = []
+        for folio, street_number, street_name, street_type, city in rows:
+            address = ' '.join(part for part in (street_number, street_name, street_type) if part)
+            suggestions.append({
+                'type': 'address',
+                'value': address,
+                'label': f"{address}, {city}" if city else address,
+                'folio_number': folio,
+                'properties': 1,
+            })
+        return suggestions
+    
+    @classmethod
+    def _owners(cls, db: Session, prefix: str, limit: int) -> list:
+        rows = db.query(
+            cls.owner_key, func.count(Property.id), func.min(Property.folio_number)
+        ).filter(
+            cls._prefix_range(cls.owner_key, prefix)
+        ).group_by(cls.owner_key).order_by(cls.owner_key).limit(limit).all()
+        return [
+            {
+                'type': 'owner',
+                'value': owner,
+                'label': owner if count == 1 else f"{owner} ({count} properties)",
+                'folio_number': folio if count == 1 else None,
+                'properties': count,
+            }
+            for owner, count, folio in rows
+        ]
+    
+    @classmethod
+    def _streets(cls, db: Session, prefix: str, limit: int) -> list:
+        rows = db.query(
+            cls.street_key, func.count(Property.id)
+        ).filter(
+            cls._prefix_range(cls.street_key, prefix)
+        ).group_by(cls.street_key).order_by(cls.street_key).limit(limit).all()
+        return [
+            {
+                'type': 'street',
+                'value': street,
+                'label': f"{street} ({count} properties)",
+                'folio_number': None,
+                'properties': count,
+            }
+            for street, count in rows
+        ]
@@ -0,0 +1,158 @@
+"""
+PrimeBroward CRM - listing benchmark
+Times the property, lead and letter history listings at limit=1000 against a
+seeded database. To compare two versions, seed one data directory and point
+each checkout's app at it:
+
+    python benchmark_listings.py --data-dir /tmp/bench
+    git worktree add /tmp/before <commit>
+    python benchmark_listings.py --data-dir /tmp/bench --app /tmp/before/server
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FIELDS = (
+    "folio_number,name_line_1,situs_street_number,situs_street_name,situs_city,"
+    "just_value,potential_equity,lead_status,created_date"
+)
+
+CASES = [
+    ("/properties", {"count_mode": "none"}),
+    ("/properties", {"count_mode": "none", "sort": "just_value"}),
+    ("/properties", {"count_mode": "none", "fields": FIELDS}),
+    ("/leads", {}),
+    ("/leads", {"status": "New", "sort": "offer_amount", "order": "asc"}),
+    ("/letters/history", {}),
+]
+
+STREETS = ["OCEAN", "LAS OLAS", "SUNRISE", "ATLANTIC", "FEDERAL", "PINE ISLAND", "UNIVERSITY"]
+CITIES = ["FORT LAUDERDALE", "HOLLYWOOD", "POMPANO BEACH", "CORAL SPRINGS", "DAVIE", "PLANTATION"]
+SURNAMES = ["SMITH", "GARCIA", "JOHNSON", "RODRIGUEZ", "WILLIAMS", "BROWN", "LOPEZ", "DAVIS"]
+LEAD_STATUSES = ["New", "Contacted", "Negotiating", "Under Contract", "Sold", "Dead"]
+
+
+def seed(db, properties: int, leads: int, letters: int, seed_value: int = 1):
+    """Fill an empty database with generated properties, leads and letter history"""
+    from app.config import settings
+    from app.models import Property, Lead, LetterHistory
+    
+    rng = random.Random(seed_value)
+    for start in range(0, properties, 10000):
+        rows = []
+        for i in range(start, min(start + 10000, properties)):
+            stamp = rng.choice([0, rng.randint(500, 5000)])
+            just_value = rng.randint(80, 1500) * 1000
+            price = round(stamp / settings.DOC_STAMP_RATE) if stamp else None
+            rows.append({
+                "folio_number": f"{494200000000 + i}",
+                "name_line_1": f"{rng.choice(SURNAMES)} {rng.choice(SURNAMES)}",
+                "mailing_address_line_1": f"{rng.randint(1, 9999)} {rng.choice(STREETS)} ST",
+                "mailing_city": rng.choice(CITIES),
+                "mailing_state": rng.choice(["FL", "FL", "FL", "NY", "NJ"]),
+                "mailing_zip": f"33{rng.randint(300, 399)}",
+                "situs_street_number": str(rng.randint(1, 9999)),
+                "situs_street_name": rng.choice(STREETS),
+                "situs_street_type": rng.choice(["ST", "AVE", "BLVD", "DR"]),
+                "situs_city": rng.choice(CITIES),
+                "situs_zip": f"33{rng.randint(300, 399)}",
+                "use_code": rng.choice(["01", "04", "08"]),
+                "bldg_year_built": rng.randint(1940, 2022),
+                "bldg_tot_sq_footage": rng.randint(600, 5000),
+                "beds": rng.randint(1, 6),
+                "baths": rng.choice([1.0, 1.5, 2.0, 2.5, 3.0]),
+                "just_value": just_value,
+                "homestead_flag": rng.random() < 0.6,
+                "sale_date_1": f"{rng.randint(1990, 2024)}-{rng.randint(1, 12):02d}-01",
+                "deed_type_1": rng.choice(["WD", "SWD", "QCD"]),
+                "stamp_amount_1": stamp or None,
+                "estimated_purchase_price": price,
+                "calc_confidence": "Low" if stamp else "None",
+                "potential_equity": just_value - price if price else None,
+                "is_absentee_owner": rng.random() < 0.3,
+            })
+        db.execute(Property.__table__.insert(), rows)
+    
+    folios = rng.sample(range(properties), min(leads + letters, properties))
+    db.execute(Lead.__table__.insert(), [
+        {
+            "folio_number": f"{494200000000 + i}",
+            "lead_status": rng.choice(LEAD_STATUSES),
+            "offer_amount": rng.randint(50, 900) * 1000,
+            "notes": "Generated for the listing benchmark",
+        }
+        for i in folios[:leads]
+    ])
+    db.execute(LetterHistory.__table__.insert(), [
+        {"folio_number": f"{494200000000 + i}", "file_path": f"letter_{i}.pdf"}
+        for i in folios[-letters:]
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the listing endpoints at limit=1000")
+    parser.add_argument("--data-dir", help="data directory to use, seeded if it has no properties (default: a temp dir)")
+    parser.add_argument("--app", default=str(Path(__file__).resolve().parent), help="server directory whose app to time")
+    parser.add_argument("--properties", type=int, default=200000, help="properties to seed (default 200000)")
+    parser.add_argument("--leads", type=int, default=4000, help="leads to seed (default 4000)")
+    parser.add_argument("--letters", type=int, default=4000, help="letters to seed (default 4000)")
+    parser.add_argument("--limit", type=int, default=1000, help="page size (default 1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per case (default 20)")
+    parser.add_argument("--json", action="store_true", help="print the timings as JSON")
+    args = parser.parse_args()
+    
+    # settings reads DATA_DIR on import, and the startup import must not run
+    os.environ["DATA_DIR"] = args.data_dir or tempfile.mkdtemp(prefix="primebroward-bench-")
+    os.environ.pop("CSV_URL", None)
+    sys.path.insert(0, args.app)
+    
+    from fastapi.testclient import TestClient
+    from app.main import app, lazy_init
+    from app.models import Property, init_db
+    from app.models.database import SessionLocal
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        if not db.query(Property.id).first():
+            started = time.perf_counter()
+            seed(db, args.properties, args.leads, args.letters)
+            print(f"Seeded {os.environ['DATA_DIR']} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    finally:
+        db.close()
+    lazy_init()
+    
+    client = TestClient(app)
+    results = []
+    for path, params in CASES:
+        params = {**params, "limit": args.limit}
+        response = client.get(path, params=params)  # Warm the caches
+        response.raise_for_status()
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            client.get(path, params=params)
+        results.append({
+            "path": path,
+            "params": params,
+            "ms": round((time.perf_counter() - started) / args.repeat * 1000, 1),
+            "kb": len(response.content) // 1024,
+        })
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        params = " ".join(f"{key}={value}" for key, value in result["params"].items() if key != "fields")
+        if "fields" in result["params"]:
+            params += " fields=..."
+        print(f"{result['ms']:>8.1f}ms {result['kb']:>6}KB  {result['path']} {params}")
+
+
+if __name__ == "__main__":
+    main()
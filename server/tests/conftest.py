@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Point the app at a throwaway data directory before anything imports it
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='primebroward-tests-')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
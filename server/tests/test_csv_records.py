@@ -0,0 +1,127 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services import CSVService
+
+HEADER = b'folio_number,name_line_1,notes,situs_city\n'
+
+
+def _sample_csv(rows: int = 60) -> bytes:
+    """Rows with stray quotes in unquoted fields and quoted fields spanning lines"""
+    lines = [HEADER]
+    for i in range(rows):
+        if i % 5 == 0:
+            notes = b'PIPE 12" WIDE'  # A quote inside an unquoted field is a character
+        elif i % 5 == 1:
+            notes = b'"first line\nsecond, with ""quotes""\nthird"'
+        elif i % 5 == 2:
+            notes = b'"quoted"trailing'
+        elif i % 5 == 3:
+            notes = b'"a ""b"", c"'
+        else:
+            notes = b''
+        lines.append(b'%d,OWNER %d,%s,HOLLYWOOD\n' % (i, i, notes))
+        if i % 7 == 0:
+            lines.append(b'\n')
+    return b''.join(lines)
+
+
+def _read(data: bytes) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(data), header=None, dtype=str, keep_default_na=False)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1000])
+def test_blocks_split_on_the_records_read_csv_sees(chunk_size):
+    data = _sample_csv()
+    expected = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    
+    stream = io.BytesIO(data)
+    columns, offset = CSVService._read_header(stream)
+    assert columns == list(expected.columns)
+    
+    frames = []
+    ends = []
+    for block, records, end in CSVService._iter_blocks(stream, chunk_size, offset):
+        frame = _read(block)
+        assert len(frame) == records <= chunk_size
+        frames.append(frame)
+        ends.append(end)
+    assert ends == sorted(ends) and ends[-1] == len(data)
+    
+    rows = pd.concat(frames, ignore_index=True)
+    rows.columns = expected.columns
+    pd.testing.assert_frame_equal(rows, expected)
+
+
+def test_odd_number_of_stray_quotes_keeps_blocks_bounded():
+    data = HEADER + b''.join(b'%d,OWNER %d,12" PIPE,CITY\n' % (i, i) for i in range(25))
+    stream = io.BytesIO(data)
+    offset = CSVService._read_header(stream)[1]
+    assert [records for _, records, _ in CSVService._iter_blocks(stream, 10, offset)] == [10, 10, 5]
+
+
+def test_scan_fields_counts_separators_outside_quotes():
+    assert CSVService._scan_fields(b'1,PIPE 12" WIDE,x\n') == (False, 2)
+    assert CSVService._scan_fields(b'1,"a, ""b"", c",x\n') == (False, 2)
+    assert CSVService._scan_fields(b'1,"multi\nline, note",x\n') == (False, 2)
+    assert CSVService._scan_fields(b'1,"open, still\n') == (True, 1)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rows_with_the_wrong_field_count_are_rejected(workers):
+    columns = ['folio_number', 'name_line_1', 'stamp_amount_1', 'deed_type_1', 'owners_domicile']
+    block = (
+        b'1,A,700,WD,FL\n'
+        b'2,B,1,050,WD,FL\n'  # One field too many; read_csv would drop the last
+        b'3,C,700\n'  # Too few; read_csv would pad it with nulls
+        b'4,"D, JR",1400,SWD,NY\n'
+    )
+    results = list(CSVService._transformed_chunks(
+        [(block, 4, len(block))], CSVService.transform_block, columns, workers, 2, first_row=10
+    ))
+    assert len(results) == 1
+    _, rows, records, errors, _ = results[0]
+    
+    assert rows == 4
+    assert [record['folio_number'] for record in records] == ['1', '4']
+    assert records[1]['name_line_1'] == 'D, JR' and records[1]['deed_type_1'] == 'SWD'
+    assert errors == [
+        {'row': 11, 'folio': '2', 'error': 'Expected 5 fields, got 6', 'line': '2,B,1,050,WD,FL'},
+        {'row': 12, 'folio': '3', 'error': 'Expected 5 fields, got 3', 'line': '3,C,700'},
+    ]
+
+
+def test_header_spanning_lines():
+    data = b'folio_number,"owner\nname",notes\n1,A,B\n'
+    assert CSVService.parse_header(data[:20]) is None
+    assert CSVService.parse_header(data) == ['folio_number', 'owner\nname', 'notes']
+
+
+def test_in_quoted_field():
+    assert not CSVService._in_quoted_field(b'1,PIPE 12" WIDE,x\n')
+    assert CSVService._in_quoted_field(b'1,"open\n')
+    assert not CSVService._in_quoted_field(b'1,"a ""b"" c",x\n')
+    assert CSVService._in_quoted_field(b'still ""inside\n', quoted=True)
+    assert not CSVService._in_quoted_field(b'end" 12" here\n', quoted=True)
+
+
+def test_import_with_stray_quotes_imports_every_row(tmp_path):
+    from sqlalchemy import func
+    from app.models import Property, init_db
+    from app.models.database import SessionLocal
+    
+    init_db()
+    path = tmp_path / 'stray.csv'
+    path.write_bytes(_sample_csv(500))
+    db = SessionLocal()
+    try:
+        result = CSVService.import_csv(db, str(path), chunk_size=37)
+        assert result['error_count'] == 0
+        assert result['total_rows'] == 500
+        assert db.query(func.count(Property.id)).scalar() == 500
+        owner = db.query(Property.name_line_1).filter(Property.folio_number == '499').scalar()
+        assert owner == 'OWNER 499'
+    finally:
+        db.close()
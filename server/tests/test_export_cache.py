@@ -0,0 +1,44 @@
+import os
+
+from app.config import settings
+from app.services import ExportCache
+
+
+def _write(name: str, size: int, mtime: float):
+    path = settings.EXPORTS_DIR / name
+    path.write_bytes(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_trim_only_removes_cache_entries():
+    for path in settings.EXPORTS_DIR.iterdir():
+        path.unlink()
+    old = _write(ExportCache.key(1, 'csv') + '.csv', 10, 1000)
+    current = _write(ExportCache.key(2, 'csv') + '.csv', 10, 1000)
+    writing = _write(f".{ExportCache.key(2, 'arrow')}.{'0' * 32}.part", 10, 1000)
+    others = [
+        _write('bcpa_export_20240101_120000.csv', 10, 1000),
+        _write('v1_notes.txt', 10, 1000),
+        _write(ExportCache.key(1, 'csv') + '.csv.bak', 10, 1000),
+        _write('README', 10, 1000),
+    ]
+    
+    ExportCache.trim(budget=100, version=2)
+    
+    assert not old.exists()
+    assert current.exists() and writing.exists()
+    assert all(path.exists() for path in others)
+
+
+def test_trim_evicts_least_recently_used_entries_over_budget():
+    for path in settings.EXPORTS_DIR.iterdir():
+        path.unlink()
+    oldest = _write(ExportCache.key(3, 'csv') + '.csv', 60, 1000)
+    newest = _write(ExportCache.key(3, 'parquet', compression='zstd') + '.parquet', 60, 2000)
+    unrelated = _write('manual_backup.csv', 500, 500)
+    
+    ExportCache.trim(budget=100, version=3)
+    
+    assert not oldest.exists()
+    assert newest.exists() and unrelated.exists()
@@ -0,0 +1,138 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.models import Property, init_db
+from app.models.database import SessionLocal
+from app.services.import_sources import HTTPRangeReader, SourceChangedError
+
+HEADER = b'folio_number,name_line_1,situs_city\n'
+
+
+class FakeSpaces:
+    """
+    Local stand-in for the Spaces object: serves Range and If-Range, and can
+    drop the first response partway through and swap the object when it does
+    """
+    
+    def __init__(self, body: bytes, etag: str = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.drop_after = None  # Bytes of the next response to send before dropping it
+        self.replacement = None  # (body, etag) to serve once a response was dropped
+        self.requests = []
+        
+        spaces = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                spaces.handle(self)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/properties.csv'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def handle(self, handler):
+        range_header = handler.headers.get('Range')
+        if_range = handler.headers.get('If-Range')
+        self.requests.append((range_header, if_range))
+        
+        start = 0
+        if range_header and (if_range is None or if_range == self.etag):
+            start = int(range_header[len('bytes='):].rstrip('-'))
+        payload = self.body[start:]
+        
+        handler.send_response(206 if start else 200)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.send_header('ETag', self.etag)
+        handler.send_header('Accept-Ranges', 'bytes')
+        if start:
+            handler.send_header('Content-Range', f'bytes {start}-{len(self.body) - 1}/{len(self.body)}')
+        handler.end_headers()
+        
+        if self.drop_after is not None:
+            handler.wfile.write(payload[:self.drop_after])
+            handler.wfile.flush()
+            self.drop_after = None
+            if self.replacement:
+                self.body, self.etag = self.replacement
+                self.replacement = None
+            handler.connection.shutdown(socket.SHUT_RDWR)
+            handler.close_connection = True
+            return
+        handler.wfile.write(payload)
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _csv(rows: range, city: bytes) -> bytes:
+    return HEADER + b''.join(b'HTTP%05d,OWNER %d,%s\n' % (i, i, city) for i in rows)
+
+
+@pytest.fixture
+def spaces():
+    server = FakeSpaces(_csv(range(2000), b'HOLLYWOOD'))
+    yield server
+    server.close()
+
+
+def test_dropped_connection_resumes_with_range_and_if_range(spaces):
+    spaces.drop_after = 10000
+    reader = HTTPRangeReader(spaces.url, backoff=0.01)
+    try:
+        data = b''
+        while chunk := reader.read(4096):
+            data += chunk
+    finally:
+        reader.close()
+    
+    assert data == spaces.body
+    assert spaces.requests == [(None, None), ('bytes=10000-', '"v1"')]
+
+
+def test_changed_etag_is_not_spliced(spaces):
+    spaces.drop_after = 10000
+    spaces.replacement = (_csv(range(1500), b'DAVIE'), '"v2"')
+    reader = HTTPRangeReader(spaces.url, backoff=0.01)
+    try:
+        with pytest.raises(SourceChangedError):
+            while reader.read(4096):
+                pass
+    finally:
+        reader.close()
+    
+    # The resume asked for the old version only; the server sent the new one whole
+    assert spaces.requests[-1] == ('bytes=10000-', '"v1"')
+
+
+def test_changed_etag_restarts_the_import(spaces):
+    from app import main
+    
+    init_db()
+    spaces.drop_after = 10000
+    spaces.replacement = (_csv(range(1500), b'DAVIE'), '"v2"')
+    db = SessionLocal()
+    try:
+        source = HTTPRangeReader(spaces.url, backoff=0.01)
+        first_key = source.source_key
+        result = main.stream_csv_url(db, source)
+        
+        assert result['total_rows'] == 1500
+        assert result['error_count'] == 0
+        cities = dict(db.query(Property.folio_number, Property.situs_city).filter(
+            Property.folio_number.in_(['HTTP00000', 'HTTP01499'])
+        ))
+        assert cities == {'HTTP00000': 'DAVIE', 'HTTP01499': 'DAVIE'}
+    
+        # Started over: the second download began at the first byte, under a new key
+        assert spaces.requests[-2:] == [('bytes=10000-', '"v1"'), (None, None)]
+        assert HTTPRangeReader(spaces.url).source_key != first_key
+    finally:
+        db.close()
@@ -0,0 +1,68 @@
+import pytest
+
+from app.models import ImportCheckpoint, init_db
+from app.models.database import SessionLocal
+from app.services import CSVService
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.query(ImportCheckpoint).delete()
+        session.commit()
+        session.close()
+
+
+def test_source_key_sees_changes_between_first_and_last_block(tmp_path):
+    path = tmp_path / 'big.csv'
+    data = bytearray(b'x' * 4096)
+    path.write_bytes(bytes(data))
+    before = CSVService.source_key(path, sample_size=64, samples=16)
+    
+    # A block sample sits at every (4096 - 64) // 15 bytes
+    data[2 * 268] = ord('y')
+    path.write_bytes(bytes(data))
+    assert CSVService.source_key(path, sample_size=64, samples=16) != before
+
+
+def test_source_key_hashes_small_files_whole(tmp_path):
+    path = tmp_path / 'small.csv'
+    path.write_bytes(b'a' * 1000)
+    before = CSVService.source_key(path, sample_size=64, samples=16)
+    path.write_bytes(b'a' * 500 + b'b' + b'a' * 499)
+    assert CSVService.source_key(path, sample_size=64, samples=16) != before
+
+
+def test_unfinished_import_is_per_source(db):
+    db.add(ImportCheckpoint(source_key='upload', status='running'))
+    db.add(ImportCheckpoint(source_key='done', status='complete'))
+    db.commit()
+    
+    assert CSVService.has_unfinished_import(db, 'upload')
+    assert not CSVService.has_unfinished_import(db, 'done')
+    assert not CSVService.has_unfinished_import(db, 'csv-url')
+    assert not CSVService.has_unfinished_import(db, None)
+
+
+@pytest.mark.parametrize('name, mtime, resumed', [
+    ('export.csv', 100.0, True),
+    ('export.csv', 200.0, False),  # Rewritten in place since the checkpoint
+    ('temp_upload.csv', 200.0, True),  # Another copy of the same content
+    ('export.csv', None, True),
+])
+def test_resume_checks_the_file_mtime(db, name, mtime, resumed):
+    db.add(ImportCheckpoint(
+        source_key='key', source_name='export.csv', source_mtime=100.0,
+        status='running', full_refresh=False, byte_offset=1234, rows_processed=10
+    ))
+    db.commit()
+    
+    checkpoint = CSVService._start_checkpoint(db, 'key', name, mtime, False, True)
+    assert (checkpoint.byte_offset == 1234) == resumed
+    if not resumed:
+        assert checkpoint.source_mtime == mtime
+        assert checkpoint.rows_processed == 0
@@ -0,0 +1,67 @@
+import time
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import init_db
+from app.services import CSVService
+
+HEADER = b'folio_number,name_line_1,stamp_amount_1,deed_type_1,owners_domicile\n'
+
+
+def _wait_for(client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = client.get(f'/import-export/jobs/{job_id}').json()
+        if job['status'] not in ('queued', 'running'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'Import job {job_id} did not finish')
+
+
+def test_malformed_rows_are_listed_with_the_job_rejects():
+    init_db()
+    client = TestClient(app)
+    data = HEADER + (
+        b'9001,GOOD ONE,700,WD,FL\n'
+        b'9002,LONG,1,050,WD,FL\n'
+        b'9003,SHORT\n'
+        b'9004,"GOOD, TWO",1400,SWD,NY\n'
+        b'9005,"OPEN,700,WD,FL\n'
+    )
+    response = client.post('/import-export/import', files={'file': ('rejects.csv', data, 'text/csv')})
+    assert response.status_code == 200
+    job = _wait_for(client, response.json()['job_id'])
+    assert job['status'] == 'complete'
+    
+    page = client.get(f"/import-export/jobs/{job['id']}/rejects").json()
+    assert page['error_count'] == 3
+    assert [(reject['row'], reject['folio_number'], reject['reason'], reject['line']) for reject in page['rejects']] == [
+        (1, '9002', 'Expected 5 fields, got 6', '9002,LONG,1,050,WD,FL'),
+        (2, '9003', 'Expected 5 fields, got 2', '9003,SHORT'),
+        (4, '9005', 'Unterminated quoted field', '9005,"OPEN,700,WD,FL'),
+    ]
+    
+    for folio, status in [('9001', 200), ('9002', 404), ('9003', 404), ('9004', 200), ('9005', 404)]:
+        assert client.get(f'/properties/{folio}').status_code == status
+
+
+def test_rows_read_csv_refuses_are_rejected_alone(monkeypatch):
+    columns = HEADER.decode().strip().split(',')
+    read_block = CSVService._read_block.__func__
+    
+    def strict_read_block(cls, block, plan):
+        if b'REFUSED' in block:
+            raise pd.errors.ParserError('Error tokenizing data')
+        return read_block(cls, block, plan)
+    
+    monkeypatch.setattr(CSVService, '_read_block', classmethod(strict_read_block))
+    block = b'1,A,700,WD,FL\n2,REFUSED,700,WD,FL\n3,C,,,\n'
+    rows, records, errors, _ = CSVService.transform_block(columns, block, 0)
+    
+    assert rows == 3
+    assert [record['folio_number'] for record in records] == ['1', '3']
+    assert errors == [{
+        'row': 1, 'folio': '2', 'error': 'Could not parse row: Error tokenizing data', 'line': '2,REFUSED,700,WD,FL',
+    }]
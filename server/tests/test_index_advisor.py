@@ -0,0 +1,76 @@
+import threading
+import time
+
+from app.models import QueryUsage, init_db
+from app.models.database import SessionLocal
+from app.services import IndexAdvisor
+
+
+def _hits(filters: str) -> int:
+    db = SessionLocal()
+    try:
+        usage = db.query(QueryUsage).filter(QueryUsage.filters == filters).first()
+        return usage.hits if usage else 0
+    finally:
+        db.close()
+
+
+def test_record_flushes_off_the_calling_thread(monkeypatch):
+    init_db()
+    monkeypatch.setattr(IndexAdvisor, 'FLUSH_EVERY', 3)
+    flushed_on = []
+    flush = IndexAdvisor.flush.__func__
+    
+    def tracked_flush(cls):
+        flushed_on.append(threading.current_thread())
+        flush(cls)
+    
+    monkeypatch.setattr(IndexAdvisor, 'flush', classmethod(tracked_flush))
+    
+    for _ in range(3):
+        IndexAdvisor.record({'use_type': 'Residential', 'min_value': 100000}, 'just_value', 'desc')
+    assert threading.current_thread() not in flushed_on
+    
+    deadline = time.monotonic() + 5
+    while _hits('min_value,use_type') < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert _hits('min_value,use_type') == 3
+    assert flushed_on and threading.current_thread() not in flushed_on
+
+
+def test_report_flushes_pending_hits():
+    init_db()
+    IndexAdvisor.record({'homestead': True}, 'created_date', 'desc')
+    db = SessionLocal()
+    try:
+        report = IndexAdvisor.report(db, limit=None)
+    finally:
+        db.close()
+    
+    shapes = [(shape['filters'], shape['sort']) for shape in report['shapes']]
+    assert (['homestead'], 'created_date') in shapes
+
+
+def test_advised_index_makes_the_count_index_only():
+    init_db()
+    IndexAdvisor.record({'lead_status': 'new'}, 'bldg_year_built', 'asc')
+    columns = IndexAdvisor.index_columns('lead_status', 'bldg_year_built')
+    name = IndexAdvisor.PREFIX + '__'.join(columns)
+    db = SessionLocal()
+    try:
+        db.connection().exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON properties ({', '.join(columns)})")
+        report = IndexAdvisor.report(db, limit=None)
+        shape = next(
+            shape for shape in report['shapes']
+            if shape['filters'] == ['lead_status'] and shape['sort'] == 'bldg_year_built'
+        )
+        
+        assert shape['indexes_used'] == [name]
+        assert shape['count_index_only']
+        # Listings return every column, which the index doesn't hold
+        assert not shape['index_only']
+        assert report['note'] == IndexAdvisor.NOTE
+    finally:
+        db.connection().exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        db.commit()
+        db.close()
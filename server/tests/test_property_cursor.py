@@ -0,0 +1,62 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Property, init_db
+from app.models.database import SessionLocal
+
+
+def _cursor(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@pytest.fixture(scope='module')
+def client():
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(5):
+            folio = f'CURSOR{i}'
+            if db.query(Property.id).filter(Property.folio_number == folio).first() is None:
+                db.add(Property(
+                    folio_number=folio, name_line_1=f'CURSOR OWNER {i}', situs_city='CURSORVILLE', just_value=1000 * i
+                ))
+        db.commit()
+    finally:
+        db.close()
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('data', [
+    ['just_value', 'desc', {'$gt': 1}, 10],
+    ['just_value', 'desc', [1, 2], 10],
+    ['just_value', 'desc', 1000, '10'],
+    ['just_value', 'desc', 1000, None],
+    ['just_value', 'desc', 1000],
+    'not a list',
+])
+def test_crafted_cursors_are_rejected(client, data):
+    response = client.get('/properties', params={'sort': 'just_value', 'order': 'desc', 'cursor': _cursor(data)})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Invalid cursor'
+
+
+def test_cursor_for_another_sort_is_rejected(client):
+    response = client.get('/properties', params={'sort': 'just_value', 'cursor': _cursor(['created_date', 'desc', None, 10])})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Cursor is for a different sort order'
+
+
+def test_next_cursor_pages_through_the_listing(client):
+    params = {'city': 'CURSORVILLE', 'sort': 'just_value', 'order': 'asc', 'limit': 2, 'count_mode': 'none'}
+    seen = []
+    body = client.get('/properties', params=params).json()
+    while True:
+        seen.extend(row['folio_number'] for row in body['data'])
+        if not body['next_cursor']:
+            break
+        body = client.get('/properties', params={**params, 'cursor': body['next_cursor']}).json()
+    assert seen == [f'CURSOR{i}' for i in range(5)]
@@ -0,0 +1,64 @@
+from sqlalchemy import text
+
+from app.models import Property, init_db
+from app.models.database import SessionLocal, engine
+from app.services import CSVService, PropertySearch
+
+HEADER = b'folio_number,name_line_1,situs_street_number,situs_street_name,situs_city\n'
+
+
+def _csv(path, rows: range, street: str):
+    path.write_bytes(HEADER + b''.join(
+        b'%d,OWNER %d,%d,%s,HOLLYWOOD\n' % (i, i, i, street.encode()) for i in rows
+    ))
+    return path
+
+
+def _triggers(db) -> set:
+    return {name for (name,) in db.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+
+
+def _matches(db, query: str) -> int:
+    return db.query(Property.id).filter(Property.id.in_(PropertySearch.matching_ids(query))).count()
+
+
+def test_first_load_rebuilds_the_search_index_once(tmp_path, monkeypatch):
+    init_db()
+    with engine.begin() as connection:
+        connection.execute(Property.__table__.delete())
+        assert PropertySearch.ensure_index(connection)
+    
+    suspended = []
+    suspend = PropertySearch.suspend.__func__
+    
+    def tracked_suspend(cls, connection):
+        suspended.append(connection)
+        return suspend(cls, connection)
+    
+    monkeypatch.setattr(PropertySearch, 'suspend', classmethod(tracked_suspend))
+    
+    db = SessionLocal()
+    try:
+        CSVService.import_csv(db, str(_csv(tmp_path / 'first.csv', range(300), 'OCEAN')), chunk_size=50)
+        assert len(suspended) == 1
+        assert set(PropertySearch.TRIGGERS) <= _triggers(db)
+        assert _matches(db, '"ocean"*') == 300
+        
+        # Later imports keep the triggers and index row by row
+        CSVService.import_csv(db, str(_csv(tmp_path / 'more.csv', range(300, 350), 'SUNRISE')))
+        assert len(suspended) == 1
+        assert _matches(db, '"sunrise"*') == 50
+        db.execute(text(f"INSERT INTO {PropertySearch.TABLE} ({PropertySearch.TABLE}, rank) VALUES ('integrity-check', 1)"))
+    finally:
+        db.close()
+
+
+def test_ensure_index_restores_suspended_triggers():
+    init_db()
+    with engine.begin() as connection:
+        assert PropertySearch.ensure_index(connection)
+        assert PropertySearch.suspend(connection)
+    with engine.begin() as connection:
+        assert not set(PropertySearch.TRIGGERS) & _triggers(connection)
+        assert PropertySearch.ensure_index(connection)
+        assert set(PropertySearch.TRIGGERS) <= _triggers(connection)
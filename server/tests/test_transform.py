@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import CSVService
+
+NAN = np.nan
+
+# Values as they reach transform_chunk: text, NaN for what read_csv treats as
+# missing, and '' as Parquet text can still carry
+VALUES = {
+    'folio_number': ['0101', ' 0102 ', '494210', '', NAN, 'nan'],
+    'text': ['SMITH JOHN', '  PADDED  ', '123', '', NAN, 'nan', 'O\'NEIL, "J"'],
+    'zip': ['33301', '033301', '33301-1234', '', NAN],
+    'sale_date_1': ['2021-03-04', '03/04/2021', '20210304', '', NAN],
+    'int': ['1,200', '1995', '3.7', '-2', ' 42 ', '1e3', '', NAN, 'abc', '0x1A'],
+    'float': ['$1,234.50', '2.5', '0', '-0.5', '1e3', '', NAN, 'x', '1e400', '$'],
+    'homestead_flag': ['Yes', 'no', 'TRUE', '1', 'Y', 'y', '0', '', NAN],
+    'stamp_amount_1': ['700', '0', '-5', '12.6', '1,000', '', NAN, 'abc', 'inf'],
+    'just_value': ['100000', '0', '350000.5', '', NAN, 'n/a', '-inf'],
+    'deed_type_1': ['WD', 'SWD', 'QCD', 'wd', ' swd ', '', NAN],
+    'owners_domicile': ['FL', 'NY', 'fl', ' FL ', '', NAN],
+}
+
+
+def _values_for(field: str) -> list:
+    if field in VALUES:
+        return VALUES[field]
+    if field in CSVService.INT_FIELDS:
+        return VALUES['int']
+    if field in CSVService.FLOAT_FIELDS:
+        return VALUES['float']
+    if field.endswith('_zip'):
+        return VALUES['zip']
+    return VALUES['text']
+
+
+def _generated_chunk(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fields = CSVService.HASH_FIELDS
+    chunk = pd.DataFrame({
+        field: pd.Series(
+            [_values_for(field)[i] for i in rng.integers(len(_values_for(field)), size=rows)],
+            dtype=object
+        )
+        for field in fields
+    })
+    # Start the index past 0 as later chunks of a file do
+    chunk.index = pd.RangeIndex(1000, 1000 + rows)
+    return chunk
+
+
+def _same(expected, actual) -> bool:
+    # The per-row builder leaves a NaN equity where the column path stores None
+    if expected is None or (isinstance(expected, float) and math.isnan(expected)):
+        return actual is None
+    if isinstance(expected, np.generic):
+        expected = expected.item()
+    if actual is None or (isinstance(actual, float) and math.isnan(actual)):
+        return False
+    return actual == expected
+
+
+def _per_row(chunk: pd.DataFrame) -> tuple:
+    """_build_property_data over the chunk: (records by index, indexes it raised for)"""
+    expected, failed = {}, set()
+    for idx, row in chunk.iterrows():
+        try:
+            data = CSVService._build_property_data(row)
+        except Exception:
+            failed.add(idx)
+            continue
+        if data is not None:
+            expected[idx] = data
+    return expected, failed
+
+
+def _assert_matches(chunk: pd.DataFrame):
+    records, errors = CSVService.transform_chunk(chunk)
+    expected, failed = _per_row(chunk)
+    
+    # Rows the builder can't convert (an infinite stamp amount) are rejected either way
+    assert {error['row'] for error in errors} == failed
+    assert list(records.index) == list(expected)
+    assert list(records.columns) == CSVService.PROPERTY_FIELDS
+    
+    for idx, data in expected.items():
+        actual = records.loc[idx]
+        for field in CSVService.PROPERTY_FIELDS:
+            assert _same(data[field], actual[field]), (idx, field, data[field], actual[field])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_transform_chunk_matches_per_row_builder(seed):
+    _assert_matches(_generated_chunk(400, seed))
+
+
+def test_transform_chunk_without_optional_columns():
+    _assert_matches(_generated_chunk(50, 7)[['folio_number', 'name_line_1', 'stamp_amount_1']])
@@ -108,6 +108,14 @@ export const properties = {
   getUseTypes: async () => {
     return request('/properties/use-types');
   },
+  
+  /**
+   * Autocomplete folios, owners and addresses for partly typed search text
+   */
+  suggest: async (text, limit = 10) => {
+    const query = buildQueryString({ q: text, limit });
+    return request(`/properties/suggest?${query}`);
+  },
 };
 
 // ============================================================================
@@ -263,48 +271,110 @@ export const letters = {
 export const importExport = {
   /**
    * Import a CSV file (via file upload)
+   * The file is sent as the raw body so the server imports it while it
+   * uploads; this then polls the job until it ends. Parquet files are read
+   * from the end, so they go up as a regular upload instead.
    */
-  importCSV: async (file) => {
-    const formData = new FormData();
-    formData.append('file', file);
-    
-    const response = await fetch(`${API_URL}/import-export/import`, {
-      method: 'POST',
-      body: formData,
-    });
+  importCSV: async (file, onProgress) => {
+    let response;
+    if (file.name.toLowerCase().endsWith('.parquet')) {
+      const formData = new FormData();
+      formData.append('file', file);
+      response = await fetch(`${API_URL}/import-export/import`, {
+        method: 'POST',
+        body: formData,
+      });
+    } else {
+      response = await fetch(
+        `${API_URL}/import-export/import-stream?filename=${encodeURIComponent(file.name)}`,
+        {
+          method: 'POST',
+          headers: { 'Content-Type': 'text/csv' },
+          body: file,
+        }
+      );
+    }
     
     if (!response.ok) {
       const error = await response.json().catch(() => ({}));
       throw new Error(error.detail || 'Import failed');
     }
     
-    return response.json();
+    const { job_id } = await response.json();
+    return importExport.waitForJob(job_id, onProgress);
   },
   
   /**
    * Import a CSV from a local file path
    */
-  importFromPath: async (filePath) => {
-    return request(`/import-export/import-from-path?file_path=${encodeURIComponent(filePath)}`, {
+  importFromPath: async (filePath, onProgress) => {
+    const { job_id } = await request(`/import-export/import-from-path?file_path=${encodeURIComponent(filePath)}`, {
+      method: 'POST',
+    });
+    return importExport.waitForJob(job_id, onProgress);
+  },
+  
+  /**
+   * Get an import job's stage, progress and errors
+   */
+  getJob: async (jobId) => {
+    return request(`/import-export/jobs/${jobId}`);
+  },
+  
+  /**
+   * Cancel a queued or running import job
+   */
+  cancelJob: async (jobId) => {
+    return request(`/import-export/jobs/${jobId}/cancel`, {
       method: 'POST',
     });
   },
   
   /**
-   * Export properties to CSV
+   * Page through the rows an import job rejected
+   */
+  getRejects: async (jobId, offset = 0, limit = 100) => {
+    return request(`/import-export/jobs/${jobId}/rejects?offset=${offset}&limit=${limit}`);
+  },
+  
+  /**
+   * Get download URL for every row an import job rejected
+   */
+  getRejectsDownloadUrl: (jobId) => {
+    return `${API_URL}/import-export/jobs/${jobId}/rejects/download`;
+  },
+  
+  /**
+   * Poll an import job until it finishes; resolves with the completed job
+   */
+  waitForJob: async (jobId, onProgress, intervalMs = 1000) => {
+    for (;;) {
+      const job = await importExport.getJob(jobId);
+      if (onProgress) onProgress(job);
+      
+      if (job.status === 'complete') return job;
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.message || `Import ${job.status}`);
+      }
+      
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+  
+  /**
+   * Export properties to CSV (or format: 'parquet' / 'arrow')
    */
-  exportCSV: async (filters = {}) => {
-    const query = buildQueryString(filters);
-    const blob = await request(`/import-export/export?${query}`);
+  exportCSV: async (filters = {}, format = 'csv') => {
+    const query = buildQueryString({ ...filters, format: format === 'csv' ? undefined : format });
+    const suffix = { parquet: 'parquet', arrow: 'arrow' }[format] || 'csv';
     
-    // Trigger download
-    const url = window.URL.createObjectURL(blob);
+    // Link straight to the endpoint so the browser streams the export to
+    // disk as it arrives, instead of buffering it in a blob first
     const a = document.createElement('a');
-    a.href = url;
-    a.download = `bcpa_export_${new Date().toISOString().split('T')[0]}.csv`;
+    a.href = `${API_URL}/import-export/export?${query}`;
+    a.download = `bcpa_export_${new Date().toISOString().split('T')[0]}.${suffix}`;
     document.body.appendChild(a);
     a.click();
-    window.URL.revokeObjectURL(url);
     document.body.removeChild(a);
     
     return { success: true };
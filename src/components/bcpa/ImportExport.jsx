@@ -26,6 +26,8 @@ export default function ImportExport({
   const [updatedCount, setUpdatedCount] = useState(0);
   const [totalRows, setTotalRows] = useState(0);
   const [validationErrors, setValidationErrors] = useState([]);
+  const [errorCount, setErrorCount] = useState(0);
+  const [rejectsJobId, setRejectsJobId] = useState(null);
   const fileInputRef = useRef(null);
 
   const isAdmin = user?.role === 'admin';
@@ -33,8 +35,9 @@ export default function ImportExport({
   const handleFileSelect = (e) => {
     const selectedFile = e.target.files[0];
     if (selectedFile) {
-      if (!selectedFile.name.toLowerCase().endsWith('.csv')) {
-        setError('Please select a CSV file (.csv)');
+      const name = selectedFile.name.toLowerCase();
+      if (!['.csv', '.gz', '.zip', '.zst', '.parquet'].some((ext) => name.endsWith(ext))) {
+        setError('Please select a CSV file (.csv, .csv.gz, .zip or .csv.zst) or a .parquet file');
         return;
       }
       if (selectedFile.size > 1024 * 1024 * 1024) { // 1GB limit
@@ -46,6 +49,12 @@ export default function ImportExport({
     }
   };
 
+  const trackJobProgress = (job) => {
+    if (job.percent != null) {
+      setProgress(Math.max(30, job.percent));
+    }
+  };
+
   const handleImportFromPath = async () => {
     if (!filePath.trim()) {
       setError('Please enter a file path');
@@ -58,11 +67,13 @@ export default function ImportExport({
     setValidationErrors([]);
 
     try {
-      const result = await importExport.importFromPath(filePath.trim());
+      const result = await importExport.importFromPath(filePath.trim(), trackJobProgress);
       
       setImportedCount(result.imported || 0);
       setUpdatedCount(result.updated || 0);
       setTotalRows(result.total_rows || 0);
+      setErrorCount(result.error_count || 0);
+      setRejectsJobId(result.id);
       setProgress(100);
       
       if (result.error_count > 0) {
@@ -89,12 +100,14 @@ export default function ImportExport({
 
     try {
       setProgress(30);
-      const result = await importExport.importCSV(file);
+      const result = await importExport.importCSV(file, trackJobProgress);
       
       setImportedCount(result.imported || 0);
       setUpdatedCount(result.updated || 0);
       setTotalRows(result.total_rows || 0);
       setValidationErrors(result.errors || []);
+      setErrorCount(result.error_count || 0);
+      setRejectsJobId(result.id);
       setProgress(100);
       
       if (result.error_count > 0) {
@@ -112,6 +125,11 @@ export default function ImportExport({
   };
 
   const downloadErrorReport = () => {
+    // The server keeps every rejected row with its original line
+    if (rejectsJobId) {
+      window.open(importExport.getRejectsDownloadUrl(rejectsJobId), '_blank');
+      return;
+    }
     if (validationErrors.length === 0) return;
 
     const csvContent = [
@@ -230,7 +248,7 @@ export default function ImportExport({
                 <input
                   ref={fileInputRef}
                   type="file"
-                  accept=".csv"
+                  accept=".csv,.gz,.zip,.zst,.parquet"
                   onChange={handleFileSelect}
                   className="hidden"
                 />
@@ -320,11 +338,11 @@ export default function ImportExport({
                   updated <span className="font-semibold text-blue-600">{updatedCount}</span>
                 </p>
                 <p className="text-sm text-amber-700 mt-1">
-                  {validationErrors.length} records had issues
+                  {errorCount || validationErrors.length} records had issues
                 </p>
               </div>
 
-              {validationErrors.length > 0 && (
+              {(rejectsJobId || validationErrors.length > 0) && (
                 <Button 
                   variant="outline" 
                   onClick={downloadErrorReport}